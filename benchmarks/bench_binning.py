@@ -0,0 +1,81 @@
+"""
+ビンの配置（等間隔/不等間隔）ごとの平均燃料使用曲線の精度のベンチマーク（iRacing不要）
+実行方法: python -m benchmarks.bench_binning [--laps N] [--tracks 1 5 20.8]
+
+疑似セッションを走行して作成した平均曲線を各ティックの位置で補間し、
+実際の燃料使用量の周回平均との差（累積デルタの誤差）をビンの数と合わせて表示する。
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import numpy as np
+
+import src.model
+from src.curve_lookup import FuelCurveLookup
+from src.model import DEFAULT_CONFIG, Model
+from src.telemetry import TelemetryReader
+from benchmarks.fake_irsdk import make_session
+
+LAYOUTS = [
+    ('uniform', {'bin_layout': 'uniform'}),
+    ('adaptive', {'bin_layout': 'adaptive'}),
+]
+
+def run_layout(track_km:float, laps:int, config:dict):
+    """設定を適用したModelで疑似セッションを走行し、(モデル, 各ティックの[進行度, 燃料], 1周のティック数)を返す"""
+    with open(src.model.CONFIG_FILE_PATH, 'w', encoding='utf-8') as f:
+        json.dump({**DEFAULT_CONFIG, **config}, f)
+    ir, ticks_per_lap = make_session(track_km, laps)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model = Model(ir=ir, autostart=False)
+        model.connect_now()
+        reader = TelemetryReader(ir)
+        samples = []
+        while True:
+            snapshot = reader.read()
+            samples.append((snapshot.lap_pct, snapshot.fuel_level))
+            model.update_fuel_usage(snapshot)
+            if not ir.advance():
+                break
+    return model, np.array(samples), ticks_per_lap
+
+def curve_error(model:Model, samples, ticks_per_lap:int, laps:int):
+    """各ティックの位置での平均曲線と、実際の燃料使用量の周回平均との差（最大値と二乗平均平方根）"""
+    fuel_level = samples[:, 1]
+    lap_pct = samples[:ticks_per_lap, 0]
+    used = np.array([fuel_level[lap * ticks_per_lap] - fuel_level[lap * ticks_per_lap:(lap + 1) * ticks_per_lap]
+                     for lap in range(laps)])
+    truth = used.mean(axis=0)
+    profile = model.avg_fuel_usage
+    lookup = FuelCurveLookup(profile[:, 0], profile[:, 1])
+    predicted = np.array([lookup.at(pct) for pct in lap_pct])
+    error = np.abs(predicted - truth)
+    return error.max(), np.sqrt(np.mean(error ** 2))
+
+def main():
+    parser = argparse.ArgumentParser(description='ビンの配置ごとの平均曲線の精度')
+    parser.add_argument('--laps', type=int, default=4, help='各コースで走行する周回数')
+    parser.add_argument('--tracks', type=float, nargs='+', default=[1.0, 5.0, 20.8], help='コース長（km）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # 設定ファイルとプロファイルは一時ディレクトリに書き込む
+        src.model.CONFIG_FILE_PATH = os.path.join(directory, 'config.json')
+        src.model.PROFILE_DIR_PATH = os.path.join(directory, 'profiles')
+
+        header = f"{'km':>5} {'layout':>9} {'bins':>6} | {'max err L':>10} {'rms err L':>10}"
+        print(header)
+        print('-' * len(header))
+        for track_km in args.tracks:
+            for name, config in LAYOUTS:
+                model, samples, ticks_per_lap = run_layout(track_km, args.laps, config)
+                max_error, rms_error = curve_error(model, samples, ticks_per_lap, args.laps)
+                print(f"{track_km:>5.1f} {name:>9} {model.array_length:>6} | {max_error:>10.5f} {rms_error:>10.5f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+燃料のフィルタごとの揺れの除去量と遅れのベンチマーク（iRacing不要）
+実行方法: python -m benchmarks.bench_filter [--quantum 0.01] [--noise 0.002] [--window 15]
+
+60Hzの疑似的な燃料の測定値（真の値を量子化し、ノイズを加えたもの）を各フィルタに通し、
+真の値との差（燃料と、瞬間的な使用率の計算に使う隣り合うティックの差）、
+使用率が急に変わった時に推定した使用率が変化の半分に達するまでの遅れ、1ティックあたりの処理時間を表示する。
+"""
+import argparse
+import sys
+import time
+import numpy as np
+
+from src.fuel_filter import FUEL_FILTERS, create_fuel_filter
+
+TICK_RATE = 60
+WARMUP_S = 2.0  # 誤差の集計から除外する開始直後の時間（フィルタの初期化）
+
+def make_signal(seconds:float, quantum:float, noise:float, seed:int=0):
+    """(時刻, 真の燃料, 測定値, 使用率が変わるティック)を返す。使用率は数秒ごとにアクセルのオン/オフで変わる"""
+    rng = np.random.default_rng(seed)
+    ticks = int(seconds * TICK_RATE)
+    session_time = np.arange(ticks) / TICK_RATE
+    # 1秒あたりの使用量（全開 0.05L/s、アクセルオフ 0.005L/s）を数秒ごとに切り替える
+    phase = (session_time // 3.0).astype(int) % 2
+    rate = np.where(phase == 0, 0.05, 0.005)
+    truth = 100.0 - np.cumsum(rate) / TICK_RATE
+    measured = np.round((truth + rng.normal(0.0, noise, ticks)) / quantum) * quantum if quantum > 0 else truth + rng.normal(0.0, noise, ticks)
+    steps = np.flatnonzero(np.diff(phase)) + 1
+    return session_time, truth, measured, steps
+
+def run_filter(kind:str, window:int, session_time, measured):
+    """フィルタを通した燃料と1ティックあたりの処理時間（µs）を返す"""
+    fuel_filter = create_fuel_filter(kind, window)
+    output = np.empty(len(measured))
+    start = time.perf_counter_ns()
+    for i, (t, fuel) in enumerate(zip(session_time.tolist(), measured.tolist())):
+        output[i] = fuel_filter.update(t, fuel)
+    return output, (time.perf_counter_ns() - start) / len(measured) / 1000
+
+def step_delay(rate_estimate, truth_rate, steps):
+    """使用率の変化から、推定した使用率が変化の半分に達するまでの平均時間（ms）"""
+    delays = []
+    for step in steps:
+        before, after = truth_rate[step - 1], truth_rate[step]
+        threshold = (before + after) / 2
+        window = rate_estimate[step:step + TICK_RATE]
+        crossed = np.flatnonzero((window - threshold) * np.sign(after - before) >= 0)
+        if len(crossed) > 0:
+            delays.append(crossed[0] * 1000 / TICK_RATE)
+    return float(np.mean(delays)) if delays else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description='燃料のフィルタごとの揺れの除去量と遅れ')
+    parser.add_argument('--seconds', type=float, default=120.0, help='疑似的な測定の長さ（秒）')
+    parser.add_argument('--quantum', type=float, default=0.01, help='燃料の測定値の量子化の幅（L）')
+    parser.add_argument('--noise', type=float, default=0.002, help='燃料の測定値のノイズの標準偏差（L）')
+    parser.add_argument('--window', type=int, default=15, help='フィルタのサンプル数')
+    args = parser.parse_args()
+
+    session_time, truth, measured, steps = make_signal(args.seconds, args.quantum, args.noise)
+    warmup = int(WARMUP_S * TICK_RATE)
+    steps = steps[steps > warmup]
+    truth_rate = -np.diff(truth, prepend=truth[0]) * TICK_RATE
+
+    header = f"{'filter':>10} | {'fuel rms L':>10} {'rate rms L/s':>12} {'rate p-p L/s':>12} | {'delay ms':>8} | {'us/tick':>7}"
+    print(header)
+    print('-' * len(header))
+    for kind in FUEL_FILTERS:
+        output, cost_us = run_filter(kind, args.window, session_time, measured)
+        # 瞬間的な使用率（隣り合うティックの差、1秒あたりに換算）
+        rate = -np.diff(output, prepend=output[0]) * TICK_RATE
+        fuel_rms = np.sqrt(np.mean((output[warmup:] - truth[warmup:]) ** 2))
+        rate_error = rate[warmup:] - truth_rate[warmup:]
+        rate_rms = np.sqrt(np.mean(rate_error ** 2))
+        rate_peak = rate_error.max() - rate_error.min()
+        delay = step_delay(rate, truth_rate, steps)
+        print(f"{kind:>10} | {fuel_rms:>10.5f} {rate_rms:>12.4f} {rate_peak:>12.4f} | {delay:>8.1f} | {cost_us:>7.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Model/FuelUsageViewのホットパスのベンチマーク（iRacing不要、画面表示なし）
+実行方法: python -m benchmarks.bench_model [--laps N] [--tracks 0.2 1 5 20.8]
+
+1ティックの処理時間・確保メモリ、周回完了時の正規化、プロファイルの保存/読み込み、
+オフスクリーンでのpaintEventを計測し、16msのフレーム予算を超えた項目があれば終了コード1を返す。
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtGui import QImage
+from PySide6.QtWidgets import QApplication
+import src.model
+from src.model import Model
+from src.telemetry import TelemetryReader
+from src.view import FuelUsageView
+from benchmarks.fake_irsdk import make_session
+
+FRAME_BUDGET_MS = 16.0
+ALLOCATION_SAMPLE_TICKS = 1000
+PAINT_SAMPLES = 300
+
+def quiet():
+    """Modelのログ出力を抑制する"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+def percentiles(samples_ns):
+    """(p50, p99) をミリ秒で返す"""
+    if len(samples_ns) == 0:
+        return 0.0, 0.0
+    p50, p99 = np.percentile(np.asarray(samples_ns, dtype=float), [50, 99])
+    return p50 / 1e6, p99 / 1e6
+
+def create_model(track_km:float, laps:int):
+    ir, ticks_per_lap = make_session(track_km, laps)
+    with quiet():
+        model = Model(ir=ir, autostart=False)
+        model.connect_now()
+    return model, ir, ticks_per_lap
+
+def bench_ticks(track_km:float, laps:int):
+    """1ティックごとのupdate_fuel_usage / update_view_dataと周回完了時の処理時間"""
+    model, ir, _ = create_model(track_km, laps)
+    reader = TelemetryReader(ir)
+    fuel_times, view_times, lap_close_times = [], [], []
+    previous_lap = None
+    with quiet():
+        while True:
+            snapshot = reader.read()
+            start = time.perf_counter_ns()
+            model.update_fuel_usage(snapshot)
+            middle = time.perf_counter_ns()
+            model.update_view_data(snapshot)
+            end = time.perf_counter_ns()
+            if previous_lap is not None and snapshot.lap != previous_lap:
+                lap_close_times.append(middle - start)
+            else:
+                fuel_times.append(middle - start)
+            view_times.append(end - middle)
+            previous_lap = snapshot.lap
+            if not ir.advance():
+                break
+    return model, fuel_times, view_times, lap_close_times
+
+def bench_allocations(track_km:float, laps:int):
+    """1周分のデータが集まった後の1ティックあたりの一時的なメモリ確保量（バイト）"""
+    model, ir, ticks_per_lap = create_model(track_km, laps)
+    reader = TelemetryReader(ir)
+    allocations = []
+    with quiet():
+        # 平均データがある状態（2周目以降）まで計測せずに進める
+        while ir.position < ticks_per_lap * 2 + 10:
+            snapshot = reader.read()
+            model.update_fuel_usage(snapshot)
+            model.update_view_data(snapshot)
+            ir.advance()
+        tracemalloc.start()
+        try:
+            for _ in range(ALLOCATION_SAMPLE_TICKS):
+                tracemalloc.reset_peak()
+                before, _ = tracemalloc.get_traced_memory()
+                snapshot = reader.read()
+                model.update_fuel_usage(snapshot)
+                model.update_view_data(snapshot)
+                _, peak = tracemalloc.get_traced_memory()
+                allocations.append(peak - before)
+                if not ir.advance():
+                    break
+        finally:
+            tracemalloc.stop()
+    return allocations
+
+def bench_profile_io(model:Model, repeat:int=5):
+    """
+    プロファイルの保存要求（呼び出し側の待ち時間）、バックグラウンドでの書き込み完了まで、読み込みの時間（ms）
+    保存は変更がない場合に省略されるため、最初の1回だけを計測する
+    """
+    load_times = []
+    with quiet():
+        start = time.perf_counter_ns()
+        model.save_fuel_data()
+        middle = time.perf_counter_ns()
+        model.flush_writes()
+        end = time.perf_counter_ns()
+        for _ in range(repeat):
+            start_load = time.perf_counter_ns()
+            model.load_fuel_data()
+            load_times.append(time.perf_counter_ns() - start_load)
+    return (middle - start) / 1e6, (end - start) / 1e6, np.median(load_times) / 1e6
+
+def bench_paint(model:Model):
+    """オフスクリーンでのpaintEventの時間"""
+    with quiet():
+        view = FuelUsageView(model)
+    image = QImage(view.size(), QImage.Format_ARGB32_Premultiplied)
+    paint_times = []
+    for i in range(PAINT_SAMPLES):
+        cumul_delta = 0.1 * np.sin(i / 20)
+        view.update_fuel_data(0.002 * np.cos(i / 7), cumul_delta, 1.0, 1.0, (i % 100) / 100, 3)
+        image.fill(0)
+        start = time.perf_counter_ns()
+        view.render(image)
+        paint_times.append(time.perf_counter_ns() - start)
+    view.close()
+    return paint_times
+
+def main():
+    parser = argparse.ArgumentParser(description='Modelのホットパスのベンチマーク')
+    parser.add_argument('--laps', type=int, default=3, help='各コースで走行する周回数')
+    parser.add_argument('--tracks', type=float, nargs='+', default=[0.2, 1.0, 5.0, 20.8], help='コース長（km）')
+    args = parser.parse_args()
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    over_budget = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        # 設定ファイルとプロファイルは一時ディレクトリに書き込む
+        src.model.CONFIG_FILE_PATH = os.path.join(directory, 'config.json')
+        src.model.PROFILE_DIR_PATH = os.path.join(directory, 'profiles')
+
+        header = (f"{'km':>5} {'bins':>6} | {'fuel p50/p99 ms':>16} | {'view p50/p99 ms':>16} | {'lap close ms':>12} | "
+                  f"{'alloc p50/p99 B':>16} | {'save ms':>8} {'write ms':>8} {'load ms':>8} | {'paint p50/p99 ms':>17}")
+        print(header)
+        print('-' * len(header))
+        for track_km in args.tracks:
+            model, fuel_times, view_times, lap_close_times = bench_ticks(track_km, args.laps)
+            allocations = bench_allocations(track_km, args.laps)
+            save_ms, write_ms, load_ms = bench_profile_io(model)
+            paint_times = bench_paint(model)
+
+            fuel_p50, fuel_p99 = percentiles(fuel_times)
+            view_p50, view_p99 = percentiles(view_times)
+            lap_close_ms = max(lap_close_times) / 1e6 if lap_close_times else 0.0
+            alloc_p50, alloc_p99 = np.percentile(allocations, [50, 99]) if allocations else (0, 0)
+            paint_p50, paint_p99 = percentiles(paint_times)
+            print(f"{track_km:>5.1f} {model.array_length:>6} | {fuel_p50:>7.3f}/{fuel_p99:<8.3f} | {view_p50:>7.3f}/{view_p99:<8.3f} | "
+                  f"{lap_close_ms:>12.3f} | {alloc_p50:>7.0f}/{alloc_p99:<8.0f} | {save_ms:>8.2f} {write_ms:>8.2f} {load_ms:>8.2f} | "
+                  f"{paint_p50:>8.3f}/{paint_p99:<8.3f}")
+
+            stages = {
+                'tick p99': fuel_p99 + view_p99,
+                'lap close': lap_close_ms,
+                'paint p99': paint_p99,
+            }
+            for stage, elapsed in stages.items():
+                if elapsed > FRAME_BUDGET_MS:
+                    over_budget.append(f"{track_km}km {stage}: {elapsed:.2f}ms")
+
+    if over_budget:
+        print(f"\nフレーム予算（{FRAME_BUDGET_MS}ms）を超えました:")
+        for item in over_budget:
+            print(f"  {item}")
+        return 1
+    print(f"\n全ての項目がフレーム予算（{FRAME_BUDGET_MS}ms）内です")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+周回データ正規化のマイクロベンチマーク
+実行方法: python -m benchmarks.bench_resample
+"""
+import time
+import numpy as np
+from src.resample import resample_linear, resample_nearest, uniform_grid
+
+def resample_argmin_loop(sorted_data, array_length):
+    """以前のModel.update_fuel_usageで使われていたビンごとのargminループ（比較用）"""
+    normalized_data = np.zeros((array_length, 2))
+    for i in range(array_length):
+        pct = i / (array_length - 1)
+        normalized_data[i, 0] = pct
+        closest_idx = np.argmin(np.abs(sorted_data[:, 0] - pct))
+        normalized_data[i, 1] = sorted_data[closest_idx, 1]
+    return normalized_data
+
+def make_lap(samples, rng):
+    """60Hzで記録した1周分に相当する疑似データ（重複した進行度を含む）を作る"""
+    pct = np.sort(rng.uniform(0.0, 1.0, samples))
+    pct[::50] = pct[1::50][:len(pct[::50])]  # 同じLapDistPctが2回届くケース
+    fuel = np.cumsum(rng.uniform(0.0, 0.001, samples))
+    data = np.column_stack((pct, fuel))
+    return data[np.argsort(data[:, 0])]
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    rng = np.random.default_rng(0)
+    cases = [(100, 2000), (2500, 7000), (10000, 30000), (10000, 70000)]
+    print(f"{'bins':>6} {'samples':>8} {'argmin loop':>12} {'nearest':>10} {'linear':>10} {'identical':>10}")
+    for bins, samples in cases:
+        data = make_lap(samples, rng)
+        grid = uniform_grid(bins)
+        expected = resample_argmin_loop(data, bins)
+        actual = resample_nearest(data[:, 0], data[:, 1], grid)
+        identical = np.array_equal(expected[:, 0], grid) and np.array_equal(expected[:, 1], actual)
+        loop_time = best_of(lambda: resample_argmin_loop(data, bins), 1 if bins * samples > 10**8 else 3)
+        nearest_time = best_of(lambda: resample_nearest(data[:, 0], data[:, 1], grid), 20)
+        linear_time = best_of(lambda: resample_linear(data[:, 0], data[:, 1], grid), 20)
+        print(f"{bins:>6} {samples:>8} {loop_time * 1000:>10.2f}ms {nearest_time * 1000:>8.3f}ms {linear_time * 1000:>8.3f}ms {str(identical):>10}")
+
+if __name__ == "__main__":
+    main()
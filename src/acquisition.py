@@ -0,0 +1,37 @@
+from PySide6.QtCore import QThread, Signal
+from src.telemetry import TelemetryReader
+
+ACQUISITION_MODES = ('timer', 'event')
+
+class TelemetryWorker(QThread):
+    """
+    シミュレーターの新しいデータの通知を待ち、ティックごとに1つだけスナップショットを送るスレッド。
+    snapshot_readyは別スレッドから発行されるため、受け取り側のスレッドではキュー経由で処理される。
+    """
+    snapshot_ready = Signal(object)
+
+    def __init__(self, reader:TelemetryReader, parent=None):
+        super().__init__(parent)
+        self.__reader = reader
+
+    def stop(self):
+        """スレッドに終了を要求し、終了するまで待つ"""
+        self.requestInterruption()
+        self.wait()
+
+    def run(self):
+        while not self.isInterruptionRequested():
+            try:
+                # freeze_var_buffer_latestがデータ更新の通知を待つため、ここでティックに同期する
+                snapshot = self.__reader.read(wait=True)
+            except Exception as e:
+                print(f"データ取得エラー: {e}")
+                self.msleep(16)
+                continue
+
+            if self.__reader.last_read_duplicate:
+                # 同じティックは送らない（通知を待てない環境で空回りしないように少し待つ）
+                self.msleep(1)
+                continue
+
+            self.snapshot_ready.emit(snapshot)
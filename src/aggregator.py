@@ -0,0 +1,226 @@
+import numpy as np
+
+AGGREGATOR_KINDS = ('mean', 'ewma', 'median')
+
+class FuelCurveAggregator:
+    """周回ごとの燃料使用曲線（ビンごとの累積使用量）を集約する基底クラス"""
+
+    kind = None
+    _BIN_ARRAYS = ('_curve', '_variance')  # ビンの数に依存する配列（remapで補間する）
+
+    def __init__(self, bins:int):
+        self._bins = bins
+        self._count = 0
+        self._curve = np.zeros(bins)
+        self._variance = np.zeros(bins)
+
+    @property
+    def bins(self):
+        return self._bins
+
+    @property
+    def count(self):
+        """集約したラップ数"""
+        return self._count
+
+    @property
+    def curve(self):
+        """集約した燃料使用曲線"""
+        return self._curve
+
+    @property
+    def variance(self):
+        """ビンごとのラップ間の分散（update時に逐次更新）"""
+        return self._variance
+
+    def update(self, values):
+        """1周分の正規化済みデータを追加（O(bins)）"""
+        raise NotImplementedError
+
+    def seed(self, curve, count:int):
+        """状態を持たない保存データから、curveをcount周分の結果として復元する"""
+        raise NotImplementedError
+
+    def remap(self, old_grid, new_grid):
+        """ビンの配置が変わった場合に、集約の状態を新しいグリッドに補間する"""
+        for name in self._BIN_ARRAYS:
+            values = getattr(self, name)
+            if values.ndim == 1:
+                remapped = np.interp(new_grid, old_grid, values)
+            else:
+                remapped = np.array([np.interp(new_grid, old_grid, row) for row in values])
+            setattr(self, name, remapped)
+        self._bins = len(new_grid)
+
+    def state(self):
+        """プロファイルと一緒に保存する状態（配列の辞書）"""
+        return {'count': np.array(self._count)}
+
+    def load_state(self, state:dict):
+        """state()で保存した状態を復元"""
+        self._count = int(state['count'])
+
+class WelfordAggregator(FuelCurveAggregator):
+    """Welford法による逐次平均（全ラップの単純平均）"""
+
+    kind = 'mean'
+    _BIN_ARRAYS = FuelCurveAggregator._BIN_ARRAYS + ('_m2', '_delta')
+
+    def __init__(self, bins:int):
+        super().__init__(bins)
+        self._m2 = np.zeros(bins)  # 平均からの偏差の二乗和
+        self._delta = np.empty(bins)  # 作業用
+
+    def update(self, values):
+        self._count += 1
+        np.subtract(values, self._curve, out=self._delta)
+        self._curve += self._delta / self._count
+        self._m2 += self._delta * (values - self._curve)
+        self.__update_variance()
+
+    def seed(self, curve, count:int):
+        self._curve[:] = curve
+        self._m2[:] = 0.0
+        self._count = count
+        self.__update_variance()
+
+    def __update_variance(self):
+        if self._count > 1:
+            np.divide(self._m2, self._count - 1, out=self._variance)
+        else:
+            self._variance[:] = 0.0
+
+    def state(self):
+        state = super().state()
+        state['mean'] = self._curve
+        state['m2'] = self._m2
+        return state
+
+    def load_state(self, state:dict):
+        super().load_state(state)
+        self._curve[:] = state['mean']
+        self._m2[:] = state['m2']
+        self.__update_variance()
+
+class EwmaAggregator(FuelCurveAggregator):
+    """指数加重移動平均（alphaが大きいほど直近のラップを重視）"""
+
+    kind = 'ewma'
+
+    def __init__(self, bins:int, alpha:float=0.5):
+        super().__init__(bins)
+        self._alpha = min(1.0, max(0.0, alpha))
+
+    def update(self, values):
+        if self._count == 0:
+            self._curve[:] = values
+        else:
+            # 指数加重分散: var = (1 - alpha) * (var + alpha * delta^2)
+            delta = values - self._curve
+            self._curve += self._alpha * delta
+            self._variance += self._alpha * delta * delta
+            self._variance *= 1.0 - self._alpha
+        self._count += 1
+
+    def seed(self, curve, count:int):
+        self._curve[:] = curve
+        self._variance[:] = 0.0
+        self._count = count
+
+    def state(self):
+        state = super().state()
+        state['mean'] = self._curve
+        state['variance'] = self._variance
+        return state
+
+    def load_state(self, state:dict):
+        super().load_state(state)
+        self._curve[:] = state['mean']
+        if 'variance' in state:
+            self._variance[:] = state['variance']
+
+class WindowedMedianAggregator(FuelCurveAggregator):
+    """直近window周のビンごとの中央値（固定サイズのリングバッファに保持）"""
+
+    kind = 'median'
+    _BIN_ARRAYS = FuelCurveAggregator._BIN_ARRAYS + ('_ring', '_sum', '_sum_sq')
+
+    def __init__(self, bins:int, window:int=5):
+        super().__init__(bins)
+        self._window = max(1, window)
+        self._ring = np.zeros((self._window, bins))
+        self._next = 0  # 次に書き込む行
+        # 分散を再走査せずに求めるため、リング内の合計と二乗和を保持する
+        self._sum = np.zeros(bins)
+        self._sum_sq = np.zeros(bins)
+
+    @property
+    def filled(self):
+        """リングバッファに入っているラップ数"""
+        return min(self._count, self._window)
+
+    def update(self, values):
+        if self._count >= self._window:
+            # 上書きされるラップを合計から除く
+            evicted = self._ring[self._next]
+            self._sum -= evicted
+            self._sum_sq -= evicted * evicted
+        self._ring[self._next] = values
+        self._sum += values
+        self._sum_sq += np.square(values)
+        self._next = (self._next + 1) % self._window
+        self._count += 1
+        np.median(self._ring[:self.filled], axis=0, out=self._curve)
+        self.__update_variance()
+
+    def seed(self, curve, count:int):
+        self._ring[:] = curve
+        self._next = 0
+        self._count = count
+        self._curve[:] = curve
+        self.__recompute_sums()
+
+    def remap(self, old_grid, new_grid):
+        super().remap(old_grid, new_grid)
+        self.__recompute_sums()
+
+    def __recompute_sums(self):
+        rows = self._ring[:self.filled]
+        self._sum[:] = rows.sum(axis=0)
+        self._sum_sq[:] = np.square(rows).sum(axis=0)
+        self.__update_variance()
+
+    def __update_variance(self):
+        n = self.filled
+        if n > 1:
+            np.subtract(self._sum_sq, self._sum * self._sum / n, out=self._variance)
+            self._variance /= n - 1
+            np.maximum(self._variance, 0.0, out=self._variance)  # 丸め誤差で負にならないように
+        else:
+            self._variance[:] = 0.0
+
+    def state(self):
+        state = super().state()
+        state['ring'] = self._ring
+        state['next'] = np.array(self._next)
+        return state
+
+    def load_state(self, state:dict):
+        super().load_state(state)
+        ring = state['ring']
+        if ring.shape != self._ring.shape:
+            # ウィンドウ幅が変更された場合は中央値だけを引き継ぐ
+            self.seed(np.median(ring[:min(self._count, len(ring))], axis=0), self._count)
+            return
+        self._ring[:] = ring
+        self._next = int(state['next'])
+        np.median(self._ring[:self.filled], axis=0, out=self._curve)
+        self.__recompute_sums()
+
+def create_aggregator(kind:str, bins:int, ewma_alpha:float=0.5, median_window:int=5):
+    """設定に応じた集約方法を作成"""
+    if kind == 'ewma':
+        return EwmaAggregator(bins, ewma_alpha)
+    if kind == 'median':
+        return WindowedMedianAggregator(bins, median_window)
+    return WelfordAggregator(bins)
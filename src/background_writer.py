@@ -0,0 +1,78 @@
+import threading
+import time
+
+class BackgroundWriter:
+    """
+    ファイルの書き込みをバックグラウンドのスレッドで順番に実行する。
+    同じキーの書き込みが実行前に再度要求された場合は、最後の要求だけを実行する。
+    """
+
+    def __init__(self, name:str='BackgroundWriter'):
+        self.__name = name
+        self.__condition = threading.Condition()
+        self.__pending = {}  # キー -> (実行する時刻, 処理)
+        self.__busy = False
+        self.__closed = False
+        self.__thread = None  # 最初の要求で開始する
+
+    def submit(self, key:str, job, delay:float=0.0):
+        """
+        job()をdelay秒後にバックグラウンドで実行する。
+        実行前に同じキーで要求された場合は、前の要求を破棄して新しい要求の時刻から待ち直す。
+        """
+        with self.__condition:
+            if not self.__closed:
+                self.__pending[key] = (time.monotonic() + delay, job)
+                if self.__thread is None:
+                    self.__thread = threading.Thread(target=self.__run, name=self.__name, daemon=True)
+                    self.__thread.start()
+                self.__condition.notify_all()
+                return
+        # 終了後の要求はその場で実行する
+        self.__execute(job)
+
+    def flush(self, timeout:float=None):
+        """保留中の書き込みを待ち時間なしで実行し、全て完了するまで待つ"""
+        with self.__condition:
+            for key, (_, job) in self.__pending.items():
+                self.__pending[key] = (0.0, job)
+            self.__condition.notify_all()
+            return self.__condition.wait_for(lambda: not self.__pending and not self.__busy, timeout)
+
+    def close(self, timeout:float=None):
+        """保留中の書き込みを実行してからスレッドを終了する"""
+        self.flush(timeout)
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+            thread = self.__thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def __run(self):
+        condition = self.__condition
+        while True:
+            with condition:
+                while True:
+                    if not self.__pending:
+                        if self.__closed:
+                            return
+                        condition.wait()
+                        continue
+                    key = min(self.__pending, key=lambda k: self.__pending[k][0])
+                    remaining = self.__pending[key][0] - time.monotonic()
+                    if remaining <= 0:
+                        _, job = self.__pending.pop(key)
+                        self.__busy = True
+                        break
+                    condition.wait(remaining)
+            self.__execute(job)
+            with condition:
+                self.__busy = False
+                condition.notify_all()
+
+    def __execute(self, job):
+        try:
+            job()
+        except Exception as e:
+            print(f"バックグラウンドでの書き込みに失敗しました: {e}")
@@ -0,0 +1,69 @@
+from PySide6.QtCore import QObject, QTimer, Signal
+
+class ConnectionManager(QObject):
+    """
+    iRacingへの接続を管理する。
+    未接続の間は指数バックオフでstartup()を再試行し、接続中はcheck()で切断を検出する。
+    """
+    connected = Signal()
+    disconnected = Signal()
+
+    def __init__(self, ir, idle_poll_ms:int=1000, max_backoff_ms:int=10000, auto_retry:bool=True, parent=None):
+        super().__init__(parent)
+        self.__ir = ir
+        self.__auto_retry = auto_retry  # Falseの場合は再試行せず、try_connect()の呼び出しを待つ
+        self.__is_connected = False
+        self.__idle_poll_ms = max(1, idle_poll_ms)  # 未接続時の最初の再試行間隔
+        self.__max_backoff_ms = max(self.__idle_poll_ms, max_backoff_ms)  # 再試行間隔の上限
+        self.__retry_interval = self.__idle_poll_ms
+        self.__retry_timer = QTimer(self)
+        self.__retry_timer.setSingleShot(True)
+        self.__retry_timer.timeout.connect(self.try_connect)
+
+    @property
+    def is_connected(self):
+        return self.__is_connected
+
+    @property
+    def retry_interval(self):
+        """次回の再試行までの間隔（ms）"""
+        return self.__retry_interval
+
+    def start(self):
+        """接続の試行を開始"""
+        if not self.__is_connected:
+            self.__retry_interval = self.__idle_poll_ms
+            self.__retry_timer.start(0)
+
+    def stop(self):
+        """再試行を停止"""
+        self.__retry_timer.stop()
+
+    def check(self):
+        """接続中に呼び出し、切断されていればdisconnectedを発行して再試行を開始する"""
+        if not self.__is_connected or (self.__ir.is_initialized and self.__ir.is_connected):
+            return
+        self.__is_connected = False
+        # 接続先の処理（保存など）が終わってからIRSDKを閉じる
+        self.disconnected.emit()
+        self.__ir.shutdown()
+        self.__retry_interval = self.__idle_poll_ms
+        if self.__auto_retry:
+            self.__retry_timer.start(self.__retry_interval)
+
+    def try_connect(self):
+        """接続を1回試行する。失敗した場合は間隔を空けて再試行する"""
+        if self.__is_connected:
+            return True
+        self.__retry_timer.stop()
+        if self.__ir.startup() and self.__ir.is_initialized:
+            self.__is_connected = True
+            self.__retry_interval = self.__idle_poll_ms
+            self.connected.emit()
+            return True
+        if not self.__auto_retry:
+            return False
+        # 失敗するたびに間隔を倍にする（上限あり）
+        self.__retry_timer.start(self.__retry_interval)
+        self.__retry_interval = min(self.__retry_interval * 2, self.__max_backoff_ms)
+        return False
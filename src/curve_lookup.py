@@ -0,0 +1,49 @@
+import numpy as np
+
+class FuelCurveLookup:
+    """
+    平均燃料使用曲線（ラップの割合ごとの累積使用量）から、任意の位置・区間の使用量をO(1)で求める。
+    傾きの表は曲線が更新された時（周回完了時など）に1回だけ作成する。
+    """
+
+    def __init__(self, grid, curve):
+        self.__grid = grid
+        self.__curve = curve
+        self.__inv_width = 1.0 / np.diff(grid)  # 各ビンの幅の逆数
+        self.__slope = np.diff(curve) * self.__inv_width  # 各ビン内の燃料使用率（ラップの割合あたり）
+        self.__last = len(grid) - 2  # 最後のビンの開始インデックス
+        self.__scale = len(grid) - 1
+        # 等間隔のグリッドはインデックスを直接計算し、不等間隔の場合は二分探索する
+        self.__uniform = bool(np.allclose(grid, np.arange(len(grid)) / self.__scale, rtol=0.0, atol=1e-12))
+
+    def refresh(self):
+        """参照している曲線の値がその場で書き換えられた場合に、傾きの表を計算し直す（新しい配列は確保しない）"""
+        curve = self.__curve
+        np.subtract(curve[1:], curve[:-1], out=self.__slope)
+        self.__slope *= self.__inv_width
+
+    def locate(self, pct:float):
+        """pctが含まれるビンのインデックスとビン内の位置（0～1）"""
+        if self.__uniform:
+            i = int(pct * self.__scale)
+        else:
+            i = int(self.__grid.searchsorted(pct, 'right')) - 1
+        if i < 0:
+            i = 0
+        elif i > self.__last:
+            i = self.__last
+        return i, (pct - self.__grid[i]) * self.__inv_width[i]
+
+    def at(self, pct:float):
+        """ラップの割合pctまでの平均燃料使用量（線形補間）"""
+        i, _ = self.locate(pct)
+        return self.__curve[i] + (pct - self.__grid[i]) * self.__slope[i]
+
+    def between(self, start_pct:float, end_pct:float):
+        """start_pctからend_pctまでの平均燃料使用量"""
+        return self.at(end_pct) - self.at(start_pct)
+
+    def interpolate(self, values, pct:float):
+        """グリッドと同じ長さの配列valuesをpctの位置で線形補間"""
+        i, fraction = self.locate(pct)
+        return values[i] + fraction * (values[i + 1] - values[i])
@@ -0,0 +1,118 @@
+import numpy as np
+
+FUEL_FILTERS = ('none', 'alpha_beta', 'savgol')
+
+RESET_THRESHOLD = 0.5  # 推定値との差がこれ以上の場合（給油・リセット）は追従せずに測定値から再開する（L）
+MAX_INTERVAL_S = 1.0  # サンプルの間隔がこれ以上空いた場合（一時停止・接続の切断）は測定値から再開する（秒）
+
+class FuelLevelFilter:
+    """
+    量子化されたFuelLevelの揺れを取り除くフィルタの基底クラス（フィルタなし）。
+    ティックごとにupdate(セッション時間, 燃料)を呼び出し、平滑化した燃料を受け取る。
+    同じ時刻のサンプル（重複したティック）は状態を更新せずに前回の値を返す。
+    """
+
+    kind = 'none'
+
+    def __init__(self):
+        self._time = None
+        self._value = None
+
+    @property
+    def value(self):
+        """直前のupdateで返した燃料（未更新の場合はNone）"""
+        return self._value
+
+    def reset(self):
+        """状態を破棄し、次の測定値から再開する"""
+        self._time = None
+        self._value = None
+
+    def update(self, session_time:float, fuel_level:float):
+        if self._time is not None and session_time == self._time:
+            return self._value
+        if (self._time is None or not 0.0 < session_time - self._time < MAX_INTERVAL_S or
+                abs(fuel_level - self._value) >= RESET_THRESHOLD):
+            self._restart(fuel_level)
+        else:
+            self._value = self._filter(session_time - self._time, fuel_level)
+        self._time = session_time
+        return self._value
+
+    def _restart(self, fuel_level:float):
+        self._value = fuel_level
+
+    def _filter(self, dt:float, fuel_level:float):
+        return fuel_level
+
+class AlphaBetaFilter(FuelLevelFilter):
+    """
+    燃料と使用率（L/秒）を推定するα-βフィルタ。一定の使用率では遅れなく追従する。
+    window: 平滑化の強さ（同じ強さの移動平均のサンプル数、α = 2 / (window + 1)）
+    """
+
+    kind = 'alpha_beta'
+
+    def __init__(self, window:int=15):
+        super().__init__()
+        self.__alpha = 2.0 / (max(1, window) + 1)
+        self.__beta = self.__alpha ** 2 / (2.0 - self.__alpha)  # 臨界減衰となるβ
+        self.__rate = 0.0
+
+    def _restart(self, fuel_level:float):
+        self._value = fuel_level
+        self.__rate = 0.0
+
+    def _filter(self, dt:float, fuel_level:float):
+        predicted = self._value + self.__rate * dt
+        residual = fuel_level - predicted
+        self.__rate += self.__beta * residual / dt
+        return predicted + self.__alpha * residual
+
+class SavitzkyGolayFilter(FuelLevelFilter):
+    """
+    直近window個のサンプルに多項式を当てはめ、最新のサンプルの位置の値を返すSavitzky-Golayフィルタ。
+    係数は等間隔のサンプルを前提に事前に計算し、ティックごとの処理はリングバッファとの内積だけにする。
+    サンプルがwindow個に満たない間は測定値をそのまま返す。
+    """
+
+    kind = 'savgol'
+
+    def __init__(self, window:int=15, order:int=1):
+        super().__init__()
+        window = max(order + 2, window)
+        x = np.arange(1 - window, 1, dtype=float)
+        self.__coefficients = np.linalg.pinv(np.vander(x, order + 1, increasing=True))[0]
+        self.__ring = np.zeros(window)  # 最も古いサンプルが__nextの位置
+        self.__next = 0
+        self.__count = 0
+
+    def _restart(self, fuel_level:float):
+        self._value = fuel_level
+        self.__next = 0
+        self.__count = 0
+        self.__push(fuel_level)
+
+    def _filter(self, dt:float, fuel_level:float):
+        self.__push(fuel_level)
+        ring = self.__ring
+        if self.__count < len(ring):
+            return fuel_level
+        # リングバッファを古い順に並べた場合の内積（配列の連結を避けて2つに分ける）
+        split = len(ring) - self.__next
+        coefficients = self.__coefficients
+        return float(coefficients[:split] @ ring[self.__next:] + coefficients[split:] @ ring[:self.__next])
+
+    def __push(self, fuel_level:float):
+        ring = self.__ring
+        ring[self.__next] = fuel_level
+        self.__next = (self.__next + 1) % len(ring)
+        self.__count = min(self.__count + 1, len(ring))
+
+def create_fuel_filter(kind:str, window:int=15):
+    """設定に応じたフィルタを作成"""
+    if kind == 'alpha_beta':
+        return AlphaBetaFilter(window)
+    if kind == 'savgol':
+        return SavitzkyGolayFilter(window)
+    return FuelLevelFilter()
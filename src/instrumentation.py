@@ -0,0 +1,102 @@
+import json
+import time
+import numpy as np
+
+class RollingHistogram:
+    """直近window件の計測値（ナノ秒）を保持するリングバッファ"""
+
+    def __init__(self, window:int=600):
+        self.__samples = np.zeros(max(1, window), dtype=np.int64)
+        self.__next = 0
+        self.__count = 0  # これまでの計測回数
+        self.__max = 0
+
+    @property
+    def count(self):
+        return self.__count
+
+    def record(self, value_ns:int):
+        """計測値を追加（O(1)）"""
+        self.__samples[self.__next] = value_ns
+        self.__next = (self.__next + 1) % len(self.__samples)
+        self.__count += 1
+        if value_ns > self.__max:
+            self.__max = value_ns
+
+    def summary(self):
+        """直近の計測値のp50/p99と全期間の最大値（ms）"""
+        samples = self.__samples[:min(self.__count, len(self.__samples))]
+        if len(samples) == 0:
+            return {'count': 0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0}
+        p50, p99 = np.percentile(samples, [50, 99])
+        return {
+            'count': self.__count,
+            'p50_ms': round(p50 / 1e6, 3),
+            'p99_ms': round(p99 / 1e6, 3),
+            'max_ms': round(self.__max / 1e6, 3),
+        }
+
+class Instrumentation:
+    """
+    処理ごとの時間、タイマーのずれ、フレーム落ち、各種カウンタを集計する。
+    計測する側は time.perf_counter_ns() の差分を record() に渡すだけでよい。
+    """
+
+    def __init__(self, window:int=600):
+        self.__window = window
+        self.__stages = {}
+        self.__counters = {}
+        self.__jitter = RollingHistogram(window)
+        self.__last_frame_ns = None
+        self.__missed_frames = 0
+
+    def record(self, stage:str, elapsed_ns:int):
+        """処理時間を記録"""
+        histogram = self.__stages.get(stage)
+        if histogram is None:
+            histogram = self.__stages[stage] = RollingHistogram(self.__window)
+        histogram.record(elapsed_ns)
+
+    def count(self, name:str, amount:int=1):
+        """カウンタを加算"""
+        self.__counters[name] = self.__counters.get(name, 0) + amount
+
+    def frame(self, expected_interval_ms:float, now_ns:int=None):
+        """フレームの開始を記録し、予定間隔とのずれと取りこぼしたフレーム数を集計する"""
+        if now_ns is None:
+            now_ns = time.perf_counter_ns()
+        last_frame_ns = self.__last_frame_ns
+        self.__last_frame_ns = now_ns
+        if last_frame_ns is None:
+            return
+        interval_ms = (now_ns - last_frame_ns) / 1e6
+        self.__jitter.record(int(abs(interval_ms - expected_interval_ms) * 1e6))
+        if interval_ms > expected_interval_ms * 1.5:
+            self.__missed_frames += int(round(interval_ms / expected_interval_ms)) - 1
+
+    def reset_frame(self):
+        """タイマーを止めた場合などに、次のフレームの間隔を計測しないようにする"""
+        self.__last_frame_ns = None
+
+    def summary(self):
+        """集計結果を辞書で返す（計測中の別スレッドから呼び出してもよいように辞書の項目をコピーしてから集計する）"""
+        return {
+            'stages': {stage: histogram.summary() for stage, histogram in list(self.__stages.items())},
+            'jitter': self.__jitter.summary(),
+            'missed_frames': self.__missed_frames,
+            'counters': dict(self.__counters),
+        }
+
+    def log_line(self):
+        """1行の構造化ログ（JSON）"""
+        return 'perf ' + json.dumps(self.summary(), ensure_ascii=False, separators=(',', ':'))
+
+    def overlay_lines(self):
+        """デバッグ表示用の短いテキスト"""
+        summary = self.summary()
+        lines = [f"{stage}: {s['p50_ms']:.3f}/{s['p99_ms']:.3f}ms" for stage, s in summary['stages'].items()]
+        jitter = summary['jitter']
+        lines.append(f"jitter: {jitter['p50_ms']:.2f}/{jitter['p99_ms']:.2f}ms missed: {summary['missed_frames']}")
+        counters = summary['counters']
+        lines.append(f"ticks dup: {counters.get('tick.duplicate', 0)} dropped: {counters.get('tick.dropped', 0)}")
+        return lines
@@ -0,0 +1,50 @@
+import numpy as np
+
+class LapSampleBuffer:
+    """1周分のサンプル（ラップの割合, 燃料使用量, セッション時間）を保持する可変長バッファ"""
+
+    COLUMNS = 3  # [ラップの割合, 燃料使用量, セッション時間]
+
+    def __init__(self, capacity:int=8192):
+        # あらかじめ確保した配列に書き込み、足りなくなった場合のみ倍に拡張する
+        self.__data = np.empty((max(1, capacity), self.COLUMNS))
+        self.__size = 0
+
+    def __len__(self):
+        return self.__size
+
+    @property
+    def capacity(self):
+        """確保済みの行数"""
+        return self.__data.shape[0]
+
+    @property
+    def data(self):
+        """有効なサンプルのビュー（コピーしない）。次のappend/clearまでの間のみ有効"""
+        return self.__data[:self.__size]
+
+    @property
+    def last(self):
+        """最後に追加したサンプルのビュー。空の場合はNone"""
+        if self.__size == 0:
+            return None
+        return self.__data[self.__size - 1]
+
+    def append(self, lap_pct:float, fuel_used:float, session_time:float):
+        """サンプルを1件追加（償却O(1)）"""
+        if self.__size == self.__data.shape[0]:
+            self.__grow()
+        row = self.__data[self.__size]
+        row[0] = lap_pct
+        row[1] = fuel_used
+        row[2] = session_time
+        self.__size += 1
+
+    def clear(self):
+        """サンプルを破棄する。確保済みの領域はそのまま再利用する"""
+        self.__size = 0
+
+    def __grow(self):
+        new_data = np.empty((self.__data.shape[0] * 2, self.COLUMNS))
+        new_data[:self.__size] = self.__data[:self.__size]
+        self.__data = new_data
@@ -0,0 +1,126 @@
+import numpy as np
+
+# 周回完了後の検証のしきい値
+MIN_POINTS = 30  # 最低限必要なデータポイント数
+MIN_COVERAGE = 0.75  # 周回のうちデータがある範囲の最低値（ラップの割合）
+MAX_GAP = 0.1  # 隣り合うサンプルの進行度の差の上限（テレメトリの欠落・ワープ）
+BACKWARD_TOLERANCE = 0.01  # 進行度の逆戻りとして扱わない誤差（リセット・巻き戻しの検出）
+REFUEL_TOLERANCE = 0.05  # 燃料使用量の減少（給油）として扱わない誤差（L）
+WRAP_THRESHOLD = 0.5  # 周回の先頭/末尾で、前後の周の進行度が混ざったサンプルを判定する境界
+WRAP_WINDOW = 10  # スタートライン付近の揺れとして扱う、周回の先頭/末尾のサンプル数
+
+# 無効なラップの理由
+REJECT_REASONS = {
+    'session': 'レース中ではない',
+    'pit': 'ピットレーン検出',
+    'pit_end': 'ラップ終了時にピットレーン検出',
+    'tow': 'レッカー移動',
+    'points': 'データポイント不足',
+    'coverage': '周回完了度不足',
+    'gap': '進行度の欠落',
+    'non_monotonic': '進行度の逆戻り（リセット）',
+    'refuel': '給油を検出',
+}
+
+class LapStateMachine:
+    """
+    周回ごとのデータ収集の状態。
+    idle: 次の周の開始を待っている（接続直後やレース中でなくなった場合）
+    collecting: 周回の開始からデータを収集している
+    invalid: この周は無効（次の周の開始まで収集しない）
+    """
+
+    IDLE = 'idle'
+    COLLECTING = 'collecting'
+    INVALID = 'invalid'
+
+    def __init__(self, lap:int):
+        self.__lap = lap
+        self.__state = self.IDLE
+        self.__reason = None  # 無効になった理由
+
+    @property
+    def lap(self):
+        return self.__lap
+
+    @property
+    def state(self):
+        return self.__state
+
+    @property
+    def reason(self):
+        return self.__reason
+
+    @property
+    def collecting(self):
+        return self.__state == self.COLLECTING
+
+    def start_lap(self, lap:int, on_track:bool):
+        """新しい周の開始。トラック上であれば収集を開始してTrueを返す"""
+        self.__lap = lap
+        if on_track:
+            self.__state = self.COLLECTING
+            self.__reason = None
+            return True
+        self.__state = self.INVALID
+        self.__reason = 'pit'
+        return False
+
+    def stop(self):
+        """収集を中止して次の周の開始を待つ（レース中でなくなった場合）"""
+        self.__state = self.IDLE
+        self.__reason = 'session'
+
+    def invalidate(self, reason:str):
+        """この周を無効にする。新たに無効になった場合はTrue"""
+        if self.__state == self.INVALID:
+            return False
+        self.__state = self.INVALID
+        self.__reason = reason
+        return True
+
+def is_wrap_jitter(lap_pct:float, index:int):
+    """周回の先頭からindex番目のサンプルが、前の周の終わりの進行度（1.0付近）かどうか"""
+    return index < WRAP_WINDOW and lap_pct >= WRAP_THRESHOLD
+
+def wrap_jitter_mask(pct):
+    """
+    周回の先頭/末尾WRAP_WINDOW個のサンプルのうち、スタートラインの反対側の値（前後の周の進行度）をTrueにしたマスク。
+    値が行き来する揺れ（例: 0.9995, 0.0001, 0.9998, 0.001）も全て取り除けるように、連続した範囲ではなく個別に判定する。
+    """
+    mask = np.zeros(len(pct), dtype=bool)
+    mask[:WRAP_WINDOW] = pct[:WRAP_WINDOW] >= WRAP_THRESHOLD
+    mask[-WRAP_WINDOW:] |= pct[-WRAP_WINDOW:] < WRAP_THRESHOLD
+    return mask
+
+def validate_lap(data):
+    """
+    周回完了後に、バッファのサンプル（列は[ラップの割合, 燃料使用量, ...]、記録順）をまとめて検証する。
+    (無効な理由, 進行度でソート済みのサンプル) を返し、有効な場合の理由はNone。
+    周回の先頭と末尾の、前後の周の進行度が混ざったサンプル（スタートライン付近の揺れ）は除外する。
+    """
+    if len(data) < MIN_POINTS:
+        return 'points', None
+
+    # 先頭の前周の終わり（1.0付近）と末尾の次周の始まり（0付近）のサンプルを除外
+    jitter = wrap_jitter_mask(data[:, 0])
+    if jitter.any():
+        data = data[~jitter]
+        if len(data) < MIN_POINTS:
+            return 'points', None
+    pct = data[:, 0]
+
+    pct_diff = np.diff(pct)
+    if pct_diff.min() < -BACKWARD_TOLERANCE:
+        return 'non_monotonic', None
+    if pct_diff.max() > MAX_GAP:
+        return 'gap', None
+    if np.diff(data[:, 1]).min() < -REFUEL_TOLERANCE:
+        return 'refuel', None
+    if pct[-1] - pct[0] < MIN_COVERAGE:
+        return 'coverage', None
+
+    # 誤差の範囲の逆戻りがある場合だけソートする
+    if pct_diff.min() < 0:
+        data = data[np.argsort(pct, kind='stable')]
+    return None, data
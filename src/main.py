@@ -1,6 +1,6 @@
 import sys
 from PySide6.QtWidgets import QApplication
-from PySide6.QtCore import QTimer
+from PySide6.QtCore import QThread, QTimer
 import signal
 from src.model import Model
 from src.view import FuelUsageView
@@ -15,6 +15,19 @@ def main():
     model = Model()
     view = FuelUsageView(model)
     
+    # 設定に応じて、テレメトリの取得と計算をModel専用のスレッドで行う（GUIスレッドは描画だけを行う）
+    model_thread = None
+    if model.config['model_thread']:
+        model_thread = QThread()
+        model_thread.setObjectName('ModelThread')
+        model.moveToThread(model_thread)
+        model_thread.start()
+    
+    def stop_model_thread():
+        if model_thread is not None:
+            model.stop_thread()
+            model_thread.wait()
+    
     # 燃料データが更新されたときのハンドラ
     def on_fuel_data_updated():
         print("燃料使用履歴データが更新されました")
@@ -25,18 +38,22 @@ def main():
     def signal_handler(sig, frame):
         print("\nアプリケーションを終了します")
         
-        if model.save_fuel_data():
-            print('燃料使用データを保存しました')
+        # 保存はaboutToQuitで行う（Modelが別スレッドにある場合はスレッドを止めてから）
         app.quit()
     
     signal.signal(signal.SIGINT, signal_handler)
     
+    # Modelのスレッドを止めてから、GUIスレッドで取得スレッドの停止と保存を行う
+    app.aboutToQuit.connect(stop_model_thread)
+    app.aboutToQuit.connect(lambda: model.stop_worker())
+    app.aboutToQuit.connect(lambda: model.stop_publisher())
     app.aboutToQuit.connect(lambda: model.save_fuel_data())
+    app.aboutToQuit.connect(lambda: model.close_writes())  # 書き込み待ちの設定とプロファイルを保存して書き込みスレッドを終了
     
-    # デバッグ用状態表示タイマー（オプション）
+    # 処理時間の計測結果を定期的にログ出力
     status_timer = QTimer()
-    status_timer.timeout.connect(model.print_current_status)
-    status_timer.start(5000)  # 5秒ごとに状態を表示
+    status_timer.timeout.connect(model.log_performance)
+    status_timer.start(5000)  # 5秒ごとに出力
     
     print("アプリケーション起動完了")
     print("Ctrl+Cで終了")
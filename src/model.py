@@ -5,33 +5,135 @@ from PySide6.QtWidgets import QApplication
 from irsdk import IRSDK, SessionState
 import json
 import os
-import pickle
+import time
+from src.acquisition import ACQUISITION_MODES, TelemetryWorker
+from src.aggregator import AGGREGATOR_KINDS, create_aggregator
+from src.background_writer import BackgroundWriter
+from src.connection import ConnectionManager
+from src.fuel_filter import FUEL_FILTERS, create_fuel_filter
+from src.curve_lookup import FuelCurveLookup
+from src.instrumentation import Instrumentation
+from src.lap_buffer import LapSampleBuffer
+from src.lap_validator import REJECT_REASONS, LapStateMachine, validate_lap
+from src.projection import RaceProjection
+from src.publisher import TelemetryPublisher
+from src.profile_store import ProfileStore, profile_key, write_atomic
+from src.sectors import SECTOR_MODES, SectorTracker, sector_boundaries
+from src.reference import REFERENCE_MODES, ReferenceLapPool
+from src.resample import BIN_LAYOUTS, RESAMPLE_MODES, adaptive_grid, resample, uniform_grid
+from src.telemetry import TelemetryReader, TelemetrySnapshot
 
 PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CONFIG_FILE_PATH = os.path.join(PATH, 'config.json')
-FUEL_DATA_FILE_PATH = os.path.join(PATH, 'last_usage_data.picke')
+PROFILE_DIR_PATH = os.path.join(PATH, 'profiles')
+CONFIG_SAVE_DELAY_S = 0.5  # 設定の変更をまとめて書き込むまでの待ち時間（ドラッグ中などの連続した変更を1回の書き込みにする）
+
+# 設定のデフォルト値（古い設定ファイルに存在しないキーはこの値で補う）
+DEFAULT_CONFIG = {
+    'x': 0,
+    'y': 0,
+    'w': 400,
+    'h': 100,
+    'locked': False,
+    'opacity': 1.0,
+    'font_size': 20,
+    'resample_mode': 'nearest',  # 周回データの正規化方法（'nearest' または 'linear'）
+    'acquisition_mode': 'timer',  # テレメトリの取得方法（'timer': 16ms周期, 'event': ティック同期スレッド）
+    'idle_poll_ms': 1000,  # 未接続時の再接続の初回間隔（ms）
+    'max_backoff_ms': 10000,  # 再接続間隔の上限（ms）
+    'aggregator': 'mean',  # 平均の取り方（'mean': 全ラップの平均, 'ewma': 指数加重移動平均, 'median': 直近N周の中央値）
+    'ewma_alpha': 0.5,  # 'ewma'で新しいラップに掛ける重み
+    'median_window': 5,  # 'median'で使用する周回数
+    'reference_lap': 'average',  # 比較の基準（'average': 平均, 'best': 最も燃料使用量が少ないラップ, 'last': 前の周, 'median': 中央値のラップ）
+    'reference_pool_laps': 10,  # 基準のラップを選ぶために保持する直近の周回数
+    'band_sigma': 2.0,  # デルタバーに表示するばらつきの幅（標準偏差の倍数）
+    'debug_overlay': False,  # 処理時間などのデバッグ表示
+    'bin_layout': 'uniform',  # ビンの配置（'uniform': 1kmあたり500の等間隔, 'adaptive': 使用率の変化に応じた不等間隔）
+    'adaptive_bins_per_km': 100,  # 'adaptive'で使用するビンの数（1kmあたり）
+    'adaptive_warmup_laps': 2,  # 'adaptive'でビンの配置を学習するまでに集める周回数
+    'show_projection': False,  # 完走に必要な燃料などの予測を2行目に表示
+    'fps_cap': 60,  # オーバーレイの1秒あたりの最大描画回数
+    'model_thread': False,  # テレメトリの取得と計算をGUIスレッドとは別のスレッドで行う
+    'sector_mode': 'split',  # セクターの分け方（'split': シミュレーターのセクター, 'equal': sector_count個の等間隔のマイクロセクター）
+    'sector_count': 10,  # 'equal'で使用するセクター数
+    'show_sectors': False,  # セクターごとの差分をバーの下に表示
+    'fuel_filter': 'alpha_beta',  # FuelLevelの平滑化（'none': なし, 'alpha_beta': α-βフィルタ, 'savgol': Savitzky-Golayフィルタ）
+    'fuel_filter_window': 15,  # 平滑化に使用するサンプル数（大きいほど揺れが減り、使用率の変化への追従が遅れる）
+    'checkpoint_laps': 5,  # 有効なラップをこの数だけ集めるごとにプロファイルをバックグラウンドで保存（0で無効）
+    'publish_enabled': False,  # 計算したデルタと予測をローカルのUDPポートで他のオーバーレイに公開
+    'publish_port': 47810,  # 公開に使用するUDPポート（127.0.0.1のみ）
+}
 
 class Model(QObject):
     ir_connected = Signal()
     ir_disconnected = Signal()
     fuel_data_updated = Signal()  # 燃料データが更新されたことを通知するシグナル
     view_update = Signal(float, float, float, float, float, int)  # デルタ値、現在使用量、平均使用量、進行度、TrackLoc
+    band_update = Signal(float)  # 現在位置での累積差分の許容幅（ラップ間のばらつき×band_sigma、view_updateの直前に発行）
+    projection_update = Signal(float, float, float)  # 完走に必要な燃料、現在の燃料で走れる周回数、1周あたりの必要な節約量（不明な場合はNaN）
+    sector_update = Signal(object, object, int)  # セクターの境界、セクターごとの平均との差分（現在のセクター以降は前の周の値）、現在のセクター（セクターの境界を越えた時に発行）
+    # ビューからの操作（Modelが別スレッドにある場合もModelのスレッドで実行される）
+    config_change_requested = Signal(object)
+    reset_requested = Signal()
+    thread_stop_requested = Signal()
     
-    def __init__(self):
+    def __init__(self, ir=None, autostart:bool=True):
+        """
+        ir: IRSDK互換のデータソース（省略時はiRacingのIRSDK）
+        autostart: Falseの場合はタイマーを使わず、connect_now()とtick()を呼び出し側が駆動する（リプレイ用）
+        """
         super().__init__()
-        self.__ir = IRSDK()
+        self.__ir = ir if ir is not None else IRSDK()
+        self.__autostart = autostart
+        self.__instrumentation = Instrumentation()  # 処理時間などの計測
+        self.__telemetry = TelemetryReader(self.__ir, self.__instrumentation)  # 重複・欠落したティック数は計測結果にも含める
+        self.__snapshot = None  # 最後に読み取ったテレメトリ
+        self.__worker = None  # イベント駆動モードの取得スレッド
+        self.__profile_version = 0  # 平均燃料使用量データのバージョン
+        self.__projection = RaceProjection()  # レース終了までの燃料の予測
         self.__is_ir_connected = False
         self.__array_length = 100  # デフォルト配列長（initialize_modelで更新）
+        self.__rate_scale = self.__array_length - 1  # 瞬間的な変化率の単位（等間隔の場合のインデックス数）
+        self.__adaptive_bins = self.__array_length  # 'adaptive'で使用するビンの数
+        self.__grid_adapted = False  # ビンの配置を学習済みかどうか
+        self.__writer = BackgroundWriter('ModelWriter')  # 設定ファイルなどのバックグラウンドでの書き込み
+        self.__requested_config = None  # ファイルに保存済み（または書き込み待ち）の設定
+        self.__saved_profile_version = None  # 保存済み（または書き込み待ち）のプロファイルのバージョン
+        self.__laps_since_checkpoint = 0  # 最後にプロファイルを保存してから集めたラップ数
+        self.__publisher = None  # 計算結果の公開（publish_enabledの場合のみ）
         self.load_config()
+        self.__update_publisher()
+        self.__aggregator = self.__create_aggregator(self.__array_length)  # 周回データの集約（initialize_modelで作り直す）
+        self.__sectors = SectorTracker(sector_boundaries(None, self.__config['sector_mode'], self.__config['sector_count']))
+        self.__avg_fuel_usage = np.zeros((self.__array_length, 2))
+        self.__avg_fuel_usage[:, 0] = uniform_grid(self.__array_length)
+        self.__reset_reference_pool()
+        self.__on_profile_changed()
+        # 燃料プロファイルのストア（接続時に一致するプロファイルだけを読み込む）
+        self.__profile_store = ProfileStore(PROFILE_DIR_PATH)
+        self.track_id = None
+        self.car_id = None
+        self.track_config = None
         
         # 初期化メソッドを呼び出し
         # self.initialize_model()
         
-        self.__timer = QTimer()
-        self.__timer.timeout.connect(self.check_iracing)
-        self.__timer.timeout.connect(self.update_fuel_usage)
-        self.__timer.timeout.connect(self.update_view_data)
-        self.__timer.start(16)  # 約60fps
+        # データ更新用タイマー（接続中のみ動作、moveToThreadで一緒に移動するようにModelを親にする）
+        self.__timer = QTimer(self)
+        self.__timer.timeout.connect(self.tick)
+        
+        self.config_change_requested.connect(self.set_config)
+        self.reset_requested.connect(self.reset_data)
+        self.thread_stop_requested.connect(self.__on_thread_stop_requested)
+        self.view_update.connect(self.__publish_view)
+        self.projection_update.connect(self.__publish_projection)
+        
+        # 未接続の間はバックオフしながら再接続を試みる
+        self.__connection = ConnectionManager(self.__ir, self.__config['idle_poll_ms'], self.__config['max_backoff_ms'], auto_retry=autostart, parent=self)
+        self.__connection.connected.connect(self.__on_connected)
+        self.__connection.disconnected.connect(self.__on_disconnected)
+        if autostart:
+            self.__connection.start()
     
     def initialize_model(self):
         """モデルのデータを初期化"""
@@ -44,29 +146,49 @@ class Model(QObject):
                 # 1km当たり500要素、小数点以下切り捨て
                 self.__array_length = int(track_length_km * 500)
                 self.__array_length = max(100, self.__array_length)  # 最小サイズを保証
+                # 不等間隔の配置で使用するビンの数（等間隔の配列長を上限とする）
+                self.__adaptive_bins = int(track_length_km * self.__config['adaptive_bins_per_km'])
+                self.__adaptive_bins = min(self.__array_length, max(100, self.__adaptive_bins))
                 
                 print(f"コース長: {track_length_km:.2f}km, 配列サイズ: {self.__array_length}")
             except Exception as e:
                 print(f"コース長の取得に失敗: {e}")
                 self.__array_length = 100  # デフォルト値
+                self.__adaptive_bins = self.__array_length
         else:
             self.__array_length = 100  # 接続されていない場合はデフォルト値
+            self.__adaptive_bins = self.__array_length
+        # 瞬間的な変化率はビンの配置に関係なく、等間隔の配列のインデックス単位で計算する
+        self.__rate_scale = self.__array_length - 1
+        self.__grid_adapted = False
         
         # 配列を初期化（各行は[ラップの割合, 燃料使用量]）
         self.__avg_fuel_usage = np.zeros((self.__array_length, 2))
-        for i in range(self.__array_length):
-            self.__avg_fuel_usage[i, 0] = i / (self.__array_length - 1)  # X軸の値を0～1の範囲に初期化
+        self.__avg_fuel_usage[:, 0] = uniform_grid(self.__array_length)  # X軸の値を0～1の範囲に初期化
             
-        self.__collected_laps_count = 0  # 収集したラップ数
+        self.__aggregator = self.__create_aggregator(self.__array_length)  # 周回データの集約（収集したラップ数を保持）
+        self.__projection.reset()
+        # セクターの境界（シミュレーターのセクターはセッション情報から取得）
+        split_time_info = None
+        if self.__is_ir_connected and self.__ir.is_initialized:
+            try:
+                split_time_info = self.__ir['SplitTimeInfo']
+            except Exception as e:
+                print(f"セクター情報の取得に失敗: {e}")
+        self.__sectors = SectorTracker(sector_boundaries(split_time_info, self.__config['sector_mode'], self.__config['sector_count']))
+        self.__reset_reference_pool()
+        self.__on_profile_changed()
         self.__lap_start_fuel = 0
-        self.__current_lap = self.__ir['Lap']
-        self.__collecting_lap_data = False
-        # 空のNumPy配列として初期化（列は[ラップの割合, 燃料使用量]）
-        self.__current_lap_data = np.empty((0, 2))
-        self.__invalid_lap = -1  # ピットレーンに入って無効になったラップを記録
+        # 平滑化した燃料（周回のサンプルと瞬間的な使用率はこの値から計算する）
+        self.__fuel_filter = create_fuel_filter(self.__config['fuel_filter'], self.__config['fuel_filter_window'])
+        self.__fuel_level = 0.0
+        # 周回ごとのデータ収集の状態（収集中・無効とその理由）
+        self.__lap_state = LapStateMachine(self.__ir['Lap'])
+        # 周回中のサンプルバッファ（列は[ラップの割合, 燃料使用量, セッション時間]）
+        self.__lap_buffer = LapSampleBuffer()
         
-        # 瞬間的な変化を計算するためのインデックス履歴
-        self.__index_history = []  # インデックスの履歴
+        # 瞬間的な変化を計算するための進行度の履歴
+        self.__pct_history = []  # 進行度の履歴
         self.__usage_history = []  # 使用量の履歴
         self.__history_length = 5  # 履歴の長さ（5つ前と比較）
         
@@ -76,19 +198,49 @@ class Model(QObject):
     def ir(self):
         return self.__ir
     
+    @property
+    def instrumentation(self):
+        """処理時間などの計測結果（ビューの描画時間もここに記録する）"""
+        return self.__instrumentation
+    
     @property
     def config(self):
         return self.__config.copy()
     
     @property
     def avg_fuel_usage(self):
-        """平均燃料使用量データを取得するためのプロパティ"""
-        return self.__avg_fuel_usage.copy()
+        """
+        平均燃料使用量データの読み取り専用ビュー（コピーしない）。
+        内容はprofile_versionが変わった時だけ変化するので、利用側はバージョンを比較して読み直す
+        """
+        return self.__avg_fuel_usage_view
+    
+    @property
+    def profile_version(self):
+        """平均燃料使用量データが更新されるたびに増えるバージョン番号"""
+        return self.__profile_version
+    
+    @property
+    def profile_key(self):
+        """現在のトラック・車両・トラック構成に対応するプロファイルのキー（未接続時はNone）"""
+        if self.track_id is None or self.car_id is None:
+            return None
+        return profile_key(self.track_id, self.car_id, self.track_config)
+    
+    @property
+    def fuel_usage_variance(self):
+        """ビンごとのラップ間の分散を取得するためのプロパティ"""
+        return self.__variance_view
     
     @property
     def collected_laps_count(self):
         """収集したラップ数を取得するためのプロパティ"""
-        return self.__collected_laps_count
+        return self.__aggregator.count
+    
+    @property
+    def sector_stats(self):
+        """セクターの境界と、セクターごとの平均・最少・前周の燃料使用量"""
+        return self.__sectors.stats()
     
     @property
     def array_length(self):
@@ -96,36 +248,41 @@ class Model(QObject):
         return self.__array_length
     
     def load_fuel_data(self):
-        """保存されたデータを読み込むメソッド"""
+        """保存されたデータのうち、現在のトラック・車両・トラック構成に一致するものだけを読み込むメソッド"""
         if not self.__is_ir_connected or not self.__ir.is_initialized:
             return False
             
-        try:         
-            # ファイルが存在するか確認
-            if not os.path.exists(FUEL_DATA_FILE_PATH):
-                print(f"保存されたデータがありません: {FUEL_DATA_FILE_PATH}")
+        try:
+            profile = self.__profile_store.load(self.profile_key)
+            if profile is None:
+                print(f"保存されたデータがありません: {self.profile_key}")
                 return False
-                
-            # ピクルファイルからデータを読み込む
-            with open(FUEL_DATA_FILE_PATH, 'rb') as f:
-                data = pickle.load(f)
-                
+            arrays, meta = profile
+            
             # 保存されたデータが正しい形式か確認
-            if (isinstance(data, dict) and 
-                'track_id' in data and 
-                'car_id' in data and 
-                'avg_fuel_usage' in data and 
-                'collected_laps_count' in data):
+            avg_fuel_usage = arrays.get('avg_fuel_usage')
+            if (avg_fuel_usage is not None and
+                avg_fuel_usage.ndim == 2 and
+                avg_fuel_usage.shape[1] == 2 and
+                'collected_laps_count' in meta):
                 
-                # 現在のトラックと車両が一致するか確認
-                if data['track_id'] == self.track_id and data['car_id'] == self.car_id:
-                    # データを復元
-                    self.__avg_fuel_usage = np.array(data['avg_fuel_usage'])
-                    self.__collected_laps_count = data['collected_laps_count']
-                    print(f"燃料データを読み込みました: トラックID={self.track_id}, 車両ID={self.car_id}, ラップ数={self.__collected_laps_count}")
-                    return True
+                # データを復元
+                self.__avg_fuel_usage = np.array(avg_fuel_usage, dtype=float)
+                self.__array_length = len(self.__avg_fuel_usage)
+                self.__grid_adapted = meta.get('bin_layout') == 'adaptive'  # グリッドは1列目に保存されている
+                self.__aggregator = self.__create_aggregator(self.__array_length)
+                state = {key[len('aggregator_'):]: value for key, value in arrays.items() if key.startswith('aggregator_')}
+                if meta.get('aggregator') == self.__aggregator.kind and state:
+                    self.__aggregator.load_state(state)
                 else:
-                    print(f"保存されたデータが現在の環境と一致しません。保存: Track={data['track_id']}, Car={data['car_id']} 現在: Track={self.track_id}, Car={self.car_id}")
+                    # 集約方法が変わった場合や古いデータは、平均曲線を収集済みラップ数分の結果として引き継ぐ
+                    self.__aggregator.seed(self.__avg_fuel_usage[:, 1], meta['collected_laps_count'])
+                self.__avg_fuel_usage[:, 1] = self.__aggregator.curve
+                self.__reset_reference_pool()  # 基準のラップは保存しないため、グリッドに合わせて空にする
+                self.__on_profile_changed()
+                self.__saved_profile_version = self.__profile_version  # 読み込んだ内容は保存済み
+                print(f"燃料データを読み込みました: トラックID={self.track_id}, 車両ID={self.car_id}, 構成={self.track_config}, ラップ数={self.__aggregator.count}")
+                return True
             else:
                 print("無効なデータ形式です")
         except Exception as e:
@@ -134,34 +291,68 @@ class Model(QObject):
         return False
 
     def save_fuel_data(self):
-        """燃料使用データを保存するメソッド"""
+        """
+        燃料使用データを保存するメソッド。
+        現在のデータをコピーしてバックグラウンドで書き込むため、呼び出し側はファイルの書き込みを待たない。
+        前回の保存からデータが変わっていない場合は何もしない（切断時と終了時の二重保存を防ぐ）。
+        """
         # 保存するデータがない場合は終了
-        if self.__collected_laps_count == 0:
+        if self.__aggregator.count == 0 or self.profile_key is None:
             print("保存するデータがありません")
             return False
+        if self.__saved_profile_version == self.__profile_version:
+            print("燃料データは保存済みです")
+            return False
             
         try:
-            # 保存するデータを準備
-            data = {
+            # 保存するデータを準備（書き込み中に更新されないようにコピーする）
+            arrays = {
+                'avg_fuel_usage': self.__avg_fuel_usage.copy(),
+            }
+            # 集約の途中状態も保存し、次のセッションで続きから集計する
+            for key, value in self.__aggregator.state().items():
+                arrays[f'aggregator_{key}'] = np.array(value)
+            meta = {
                 'track_id': self.track_id,
                 'car_id': self.car_id,
-                'avg_fuel_usage': self.__avg_fuel_usage.tolist(),
-                'collected_laps_count': self.__collected_laps_count
+                'track_config': self.track_config,
+                'collected_laps_count': self.__aggregator.count,
+                'array_length': self.__array_length,
+                'aggregator': self.__aggregator.kind,
+                'bin_layout': 'adaptive' if self.__grid_adapted else 'uniform',
             }
             
-            # ピクルファイルにデータを保存
-            with open(FUEL_DATA_FILE_PATH, 'wb') as f:
-                pickle.dump(data, f)
-                
-            print(f"燃料データを保存しました: {FUEL_DATA_FILE_PATH}")
+            # プロファイルストアに保存（一時ファイルに書き込んでから置き換える）
+            # 同じプロファイルの書き込み待ちの要求は最新のものにまとめられる
+            key = self.profile_key
+            self.__writer.submit(f'profile:{key}', lambda: self.__write_profile(key, arrays, meta))
+            self.__saved_profile_version = self.__profile_version
+            self.__laps_since_checkpoint = 0
             return True
         except Exception as e:
             print(f"データ保存エラー: {e}")
             return False
+    
+    def __write_profile(self, key:str, arrays:dict, meta:dict):
+        """バックグラウンドのスレッドでプロファイルを書き込む"""
+        try:
+            self.__profile_store.save(key, arrays, meta)
+            print(f"燃料データを保存しました: {key}")
+        except Exception as e:
+            print(f"データ保存エラー: {e}")
+            self.__saved_profile_version = None  # 次の保存の要求で再度書き込む
         
     def delete_fuel_data(self):
+        if self.profile_key is None:
+            return
+        # 書き込み待ちの保存を取り消すため、保存と同じキーで要求する
+        key = self.profile_key
+        self.__writer.submit(f'profile:{key}', lambda: self.__delete_profile(key))
+        self.__saved_profile_version = None
+    
+    def __delete_profile(self, key:str):
         try:
-            os.remove(FUEL_DATA_FILE_PATH)
+            self.__profile_store.delete(key)
         except Exception as e:
             print(f'ファイルの削除に失敗しました: {e}')
     
@@ -173,236 +364,439 @@ class Model(QObject):
                 with open(CONFIG_FILE_PATH, 'r', encoding='utf-8') as f:
                     loaded_config = json.load(f)
                     # 古い設定ファイルに対応するため、デフォルト値を確認
-                    self.__config = {
-                        'x': loaded_config.get('x', 0),
-                        'y': loaded_config.get('y', 0),
-                        'w': loaded_config.get('w', 400),
-                        'h': loaded_config.get('h', 100),
-                        'locked': loaded_config.get('locked', False),
-                        'opacity': loaded_config.get('opacity', 1.0),
-                        'font_size': loaded_config.get('font_size', 20)
-                    }
+                    self.__config = {key: loaded_config.get(key, value) for key, value in DEFAULT_CONFIG.items()}
+                    self.__requested_config = loaded_config
             else:
                 # ファイルが存在しない場合はデフォルト値
-                self.__config = {
-                    'x': 0,
-                    'y': 0,
-                    'w': 400,
-                    'h': 100,
-                    'locked': False,
-                    'opacity': 1.0,
-                    'font_size': 20
-                }
+                self.__config = DEFAULT_CONFIG.copy()
         except Exception as e:
             print(f"設定ファイルの読み込みに失敗しました: {e}")
             # 例外発生時もデフォルト値を設定
-            self.__config = {
-                'x': 0,
-                'y': 0,
-                'w': 400,
-                'h': 100,
-                'locked': False,
-                'opacity': 1.0,
-                'font_size': 20
-            }
+            self.__config = DEFAULT_CONFIG.copy()
+        
+        if self.__config['resample_mode'] not in RESAMPLE_MODES:
+            print(f"不明な正規化方法です: {self.__config['resample_mode']}")
+            self.__config['resample_mode'] = DEFAULT_CONFIG['resample_mode']
+        if self.__config['fuel_filter'] not in FUEL_FILTERS:
+            print(f"不明な燃料のフィルタです: {self.__config['fuel_filter']}")
+            self.__config['fuel_filter'] = DEFAULT_CONFIG['fuel_filter']
+        if self.__config['aggregator'] not in AGGREGATOR_KINDS:
+            print(f"不明な集約方法です: {self.__config['aggregator']}")
+            self.__config['aggregator'] = DEFAULT_CONFIG['aggregator']
+        if self.__config['acquisition_mode'] not in ACQUISITION_MODES:
+            print(f"不明な取得方法です: {self.__config['acquisition_mode']}")
+            self.__config['acquisition_mode'] = DEFAULT_CONFIG['acquisition_mode']
+        if not isinstance(self.__config['fps_cap'], (int, float)) or self.__config['fps_cap'] <= 0:
+            print(f"不正な最大フレームレートです: {self.__config['fps_cap']}")
+            self.__config['fps_cap'] = DEFAULT_CONFIG['fps_cap']
+        if not isinstance(self.__config['publish_port'], int) or not 0 < self.__config['publish_port'] < 65536:
+            print(f"不正な公開ポートです: {self.__config['publish_port']}")
+            self.__config['publish_port'] = DEFAULT_CONFIG['publish_port']
+        if self.__config['reference_lap'] not in REFERENCE_MODES:
+            print(f"不明な比較の基準です: {self.__config['reference_lap']}")
+            self.__config['reference_lap'] = DEFAULT_CONFIG['reference_lap']
+        if self.__config['sector_mode'] not in SECTOR_MODES:
+            print(f"不明なセクターの分け方です: {self.__config['sector_mode']}")
+            self.__config['sector_mode'] = DEFAULT_CONFIG['sector_mode']
+        if self.__config['bin_layout'] not in BIN_LAYOUTS:
+            print(f"不明なビンの配置です: {self.__config['bin_layout']}")
+            self.__config['bin_layout'] = DEFAULT_CONFIG['bin_layout']
     
-    def save_config(self):
-        """現在の設定をJSONファイルに保存"""
+    def __write_config(self, config:dict):
         try:
-            with open(CONFIG_FILE_PATH, 'w', encoding='utf-8') as f:
-                json.dump(self.__config, f, ensure_ascii=False, indent=4)
+            data = json.dumps(config, ensure_ascii=False, indent=4).encode('utf-8')
+            write_atomic(CONFIG_FILE_PATH, lambda f: f.write(data))
         except Exception as e:
             print(f"設定ファイルの保存に失敗しました: {e}")
+    
+    def flush_writes(self):
+        """書き込み待ちの設定などをすぐに書き込み、完了するまで待つ（終了時に呼ぶ）"""
+        self.__writer.flush()
+    
+    def close_writes(self):
+        """書き込み待ちの設定などを書き込んでから書き込みスレッドを終了する（終了時に呼ぶ、以降の保存はその場で書き込む）"""
+        self.__writer.close()
+        
+    def __on_profile_changed(self):
+        """平均曲線が変わった時に、参照用の表と読み取り専用ビューを作り直してバージョンを進める"""
+        self.__curve_lookup = FuelCurveLookup(self.__avg_fuel_usage[:, 0], self.__avg_fuel_usage[:, 1])
+        self.__avg_fuel_usage_view = self.__avg_fuel_usage.view()
+        self.__avg_fuel_usage_view.flags.writeable = False
+        self.__variance_view = self.__aggregator.variance.view()
+        self.__variance_view.flags.writeable = False
+        lap_fuel = float(self.__avg_fuel_usage[-1, 1] - self.__avg_fuel_usage[0, 1]) if self.__aggregator.count > 0 else 0.0
+        self.__projection.set_curve(self.__curve_lookup, lap_fuel)
+        self.__sectors.set_curve(self.__curve_lookup, self.__aggregator.count > 0)
+        self.__select_reference()
+        self.__profile_version += 1
+    
+    def __adapt_grid(self):
+        """集めた周回の平均曲線から不等間隔のグリッドを作成し、集約の状態を新しいグリッドに移す"""
+        old_grid = self.__avg_fuel_usage[:, 0].copy()
+        new_grid = adaptive_grid(old_grid, self.__aggregator.curve, self.__adaptive_bins)
+        self.__aggregator.remap(old_grid, new_grid)
+        self.__reference_pool.remap(new_grid)
+        self.__avg_fuel_usage = np.column_stack((new_grid, self.__aggregator.curve))
+        self.__array_length = len(new_grid)
+        self.__grid_adapted = True
+        print(f"ビンの配置を学習しました: {len(old_grid)} -> {self.__array_length}")
+    
+    def __reset_reference_pool(self):
+        """現在のグリッドで基準のラップの保持領域を作り直す"""
+        self.__reference_pool = ReferenceLapPool(self.__avg_fuel_usage[:, 0], self.__config['reference_pool_laps'])
+    
+    def __select_reference(self):
+        """比較の基準にする参照用の表を選ぶ（参照先を変えるだけなので周回の途中でも切り替えられる）"""
+        lookup = self.__reference_pool.lookup(self.__config['reference_lap'])
+        self.__view_lookup = lookup if lookup is not None else self.__curve_lookup
+    
+    def __create_aggregator(self, bins:int):
+        """設定に応じた集約方法を作成"""
+        return create_aggregator(self.__config['aggregator'], bins, self.__config['ewma_alpha'], self.__config['median_window'])
         
     def set_config(self, config:dict):
+        """設定を変更し、少し待ってからバックグラウンドで保存する（保存済みの内容と同じ場合は書き込まない）"""
+        reference_lap = self.__config['reference_lap']
+        fuel_filter = (self.__config['fuel_filter'], self.__config['fuel_filter_window'])
         self.__config = config.copy()
-        self.save_config()
+        if self.__config['reference_lap'] != reference_lap:
+            self.__select_reference()
+        if (self.__config['fuel_filter'], self.__config['fuel_filter_window']) != fuel_filter:
+            self.__fuel_filter = create_fuel_filter(self.__config['fuel_filter'], self.__config['fuel_filter_window'])
+        self.__update_publisher()
+        if self.__config == self.__requested_config:
+            return
+        self.__requested_config = self.__config.copy()
+        requested_config = self.__requested_config
+        self.__writer.submit('config', lambda: self.__write_config(requested_config), CONFIG_SAVE_DELAY_S)
         print('設定を変更しました')
+    
+    def request_config(self, config:dict):
+        """ビューから設定の変更を要求する（Modelのスレッドでset_configを実行）"""
+        self.config_change_requested.emit(config.copy())
+    
+    def request_reset(self):
+        """ビューからデータのリセットを要求する（Modelのスレッドでreset_dataを実行）"""
+        self.reset_requested.emit()
+    
+    def stop_thread(self):
+        """
+        別スレッドで動作している場合に、Modelのスレッドでタイマーを止めてからGUIスレッドに戻し、スレッドを終了させる
+        （呼び出し側はQThread.wait()で終了を待つ）
+        """
+        self.thread_stop_requested.emit()
+    
+    def __on_thread_stop_requested(self):
+        self.__timer.stop()
+        self.__connection.stop()
+        self.__instrumentation.reset_frame()
+        thread = QThread.currentThread()
+        self.moveToThread(QApplication.instance().thread())
+        thread.quit()
+    
+    def reset_data(self):
+        """収集したデータを初期化し、保存済みのプロファイルを削除"""
+        # initialize_modelがIRSDKから読み取る間は、取得スレッドを止めてModelのスレッドだけが読み取るようにする
+        # （取得スレッドがバッファの固定を解除すると、同時に読み取った値が失われる）
+        restart_worker = self.__worker is not None
+        self.stop_worker()
+        self.initialize_model()
+        self.delete_fuel_data()
+        self.fuel_data_updated.emit()
+        if restart_worker:
+            self.start_worker()
         
+    def connect_now(self):
+        """すぐに接続を試行する（autostart=Falseの場合に使用）"""
+        return self.__connection.try_connect()
+    
     def check_iracing(self):
-        if self.__is_ir_connected and not (self.__ir.is_initialized and self.__ir.is_connected):
-            self.__is_ir_connected = False
-            self.ir_disconnected.emit()
-            if self.__collected_laps_count > 0:
-                self.save_fuel_data()
-            self.__ir.shutdown()
-            print('iracing disconnected')
-        elif not self.__is_ir_connected and self.__ir.startup() and self.__ir.is_initialized:
-            self.__is_ir_connected = True
-            self.initialize_model()
-            self.track_id = self.__ir['WeekendInfo']['TrackID']
-            self.car_id = self.__ir['DriverInfo']['Drivers'][self.__ir['DriverInfo']['DriverCarIdx']]['CarID']
-            if self.load_fuel_data():
-                self.fuel_data_updated.emit()
-            self.ir_connected.emit()
-            print('iracing connected!')
+        """接続中にiRacingが終了していないか確認（未接続時の再接続はConnectionManagerが行う）"""
+        self.__connection.check()
+    
+    def __on_connected(self):
+        self.__is_ir_connected = True
+        self.initialize_model()
+        self.track_id = self.__ir['WeekendInfo']['TrackID']
+        self.car_id = self.__ir['DriverInfo']['Drivers'][self.__telemetry.driver_car_idx]['CarID']
+        self.track_config = self.__ir['WeekendInfo'].get('TrackConfigName', '')
+        if self.load_fuel_data():
+            self.fuel_data_updated.emit()
+        self.ir_connected.emit()
+        if self.__autostart:
+            if self.__config['acquisition_mode'] == 'event':
+                self.start_worker()
+            self.__timer.start(16)  # 約60fps
+        print('iracing connected!')
+    
+    def __on_disconnected(self):
+        # 切断中はタイマーを完全に止める
+        self.__timer.stop()
+        self.__instrumentation.reset_frame()
+        self.__is_ir_connected = False
+        self.ir_disconnected.emit()
+        self.stop_worker()
+        if self.__aggregator.count > 0:
+            self.save_fuel_data()
+        self.__telemetry.reset()
+        self.__snapshot = None
+        print('iracing disconnected')
+    
+    def start_worker(self):
+        """イベント駆動モードの取得スレッドを開始"""
+        self.__worker = TelemetryWorker(self.__telemetry)
+        self.__worker.snapshot_ready.connect(self.process_snapshot, Qt.QueuedConnection)
+        self.__worker.start()
+    
+    def stop_publisher(self):
+        """計算結果の公開を停止（終了時に呼ぶ）"""
+        if self.__publisher is not None:
+            self.__publisher.close()
+            self.__publisher = None
+    
+    @property
+    def publisher_stats(self):
+        """公開したメッセージの統計（公開していない場合はNone）"""
+        return self.__publisher.stats if self.__publisher is not None else None
+    
+    def __update_publisher(self):
+        """設定に合わせて公開を開始・停止する（ポートが変わった場合は開き直す）"""
+        port = self.__config['publish_port']
+        if self.__publisher is not None and (not self.__config['publish_enabled'] or port != self.__publisher_port):
+            self.stop_publisher()
+        if self.__config['publish_enabled'] and self.__publisher is None:
+            publisher = TelemetryPublisher(port)
+            if publisher.start():
+                self.__publisher = publisher
+                self.__publisher_port = port
+    
+    def __publish_view(self, inst_delta, cumul_delta, current_usage, average_usage, lap_pct, track_loc):
+        if self.__publisher is not None:
+            self.__publisher.publish({'type': 'view', 'inst_delta': inst_delta, 'cumul_delta': cumul_delta,
+                                      'current_usage': current_usage, 'average_usage': average_usage,
+                                      'lap_pct': lap_pct, 'track_loc': track_loc})
+    
+    def __publish_projection(self, fuel_to_finish, laps_of_fuel, save_per_lap):
+        if self.__publisher is not None:
+            self.__publisher.publish({'type': 'projection', 'fuel_to_finish': fuel_to_finish,
+                                      'laps_of_fuel': laps_of_fuel, 'save_per_lap': save_per_lap})
+    
+    def stop_worker(self):
+        """取得スレッドを停止（IRSDKをshutdownする前に呼ぶ）"""
+        if self.__worker is not None:
+            self.__worker.stop()
+            self.__worker = None
+    
+    @property
+    def tick_stats(self):
+        """重複・欠落したティック数"""
+        return self.__telemetry.tick_stats
             
-    def update_fuel_usage(self):
-        """燃料使用データを更新するためのメソッド"""
-        if not self.__is_ir_connected:
+    def tick(self):
+        """タイマーごとに接続を確認し、1回だけ読み取ったテレメトリを各処理に渡す"""
+        start = time.perf_counter_ns()
+        self.check_iracing()
+        self.__instrumentation.record('check_iracing', time.perf_counter_ns() - start)
+        # イベント駆動モードではスナップショットは取得スレッドから届く
+        if not self.__is_ir_connected or self.__worker is not None:
             return
-            
-        # 必要なデータを取得
+        
         try:
-            current_lap = self.__ir['Lap']
-            current_fuel = self.__ir['FuelLevel']
-            current_lap_pct = self.__ir['LapDistPct']
-            track_loc = self.__ir['CarIdxTrackSurface'][self.__ir['DriverInfo']['DriverCarIdx']]  # ピットレーンの検出用
-            session_state = self.__ir['SessionState']  # セッション状態を取得
-            
+            snapshot = self.__telemetry.read()
         except Exception as e:
             print(f"データ取得エラー: {e}")
             return
         
+        self.process_snapshot(snapshot)
+    
+    def process_snapshot(self, snapshot:TelemetrySnapshot):
+        """1ティック分のテレメトリでデータとビューを更新"""
+        # 切断後にキューに残っていたスナップショットは無視する
+        if not self.__is_ir_connected:
+            return
+        
+        instrumentation = self.__instrumentation
+        instrumentation.frame(1000 / 60 if self.__worker is not None else 16)
+        self.__snapshot = snapshot
+        start = time.perf_counter_ns()
+        self.update_fuel_usage(snapshot)
+        middle = time.perf_counter_ns()
+        self.update_view_data(snapshot)
+        instrumentation.record('update_fuel_usage', middle - start)
+        instrumentation.record('update_view_data', time.perf_counter_ns() - middle)
+    
+    def log_performance(self):
+        """計測結果を1行のログとして出力"""
+        print(self.__instrumentation.log_line())
+            
+    def update_fuel_usage(self, snapshot:TelemetrySnapshot):
+        """燃料使用データを更新するためのメソッド"""
+        if not self.__is_ir_connected:
+            return
+            
+        # 必要なデータを取得
+        current_lap = snapshot.lap
+        # 量子化による揺れを取り除いた燃料（重複したティックでは前回の値）
+        current_fuel = self.__fuel_filter.update(snapshot.session_time, snapshot.fuel_level)
+        self.__fuel_level = current_fuel
+        current_lap_pct = snapshot.lap_pct
+        session_time = snapshot.session_time
+        track_loc = snapshot.track_loc  # ピットレーンの検出用
+        session_state = snapshot.session_state  # セッション状態を取得
+        
         # セッション状態が4（レース中）でない場合、データ収集を中止
         if session_state != 4:
-            if self.__collecting_lap_data:
+            if self.__lap_state.collecting:
                 print(f"レース中ではないため、データ収集を中止します。SessionState: {session_state}")
-                self.__collecting_lap_data = False
-                self.__current_lap_data = np.empty((0, 2))
+                self.__lap_state.stop()
+                self.__lap_buffer.clear()
             return
+        
+        lap_state = self.__lap_state
+        on_track = track_loc == 3 or track_loc == 0
             
         # 新しいラップの開始を検出
-        if current_lap != self.__current_lap:
-            # 前のラップが有効かつ完了していれば、データを処理
-            if self.__collecting_lap_data and len(self.__current_lap_data) > 0:
-                # ここで再度TrackLocをチェック - 安全のため、直前のラップのデータが有効かを確認
-                # 任意の条件を追加できる（例：ピットに入っていない、十分なデータポイント数、etc）
-                if not (track_loc == 3 or track_loc == 0):
-                    print(f"周回 {self.__current_lap} は無効です: ラップ終了時にピットレーン検出")
-                elif len(self.__current_lap_data) < 30:
-                    print(f"周回 {self.__current_lap} は無効です: データポイント不足 ({len(self.__current_lap_data)}ポイント)")
+        if current_lap != lap_state.lap:
+            # 前のラップのデータを収集していれば、まとめて検証してから処理
+            if lap_state.collecting and len(self.__lap_buffer) > 0:
+                # ラップ終了時にピットレーン/コース外なら無効（直前のラップのデータが有効かを確認）
+                if not on_track:
+                    reason, sorted_data = 'pit_end', None
                 else:
-                    # データをラップ%でソート
-                    sorted_indices = np.argsort(self.__current_lap_data[:, 0])
-                    sorted_data = self.__current_lap_data[sorted_indices]
-                    
-                    # 周回の完了度をチェック
-                    max_pct = np.max(sorted_data[:, 0])
-                    if max_pct < 0.75:
-                        print(f"周回 {self.__current_lap} は無効です: 周回完了度不足 ({max_pct:.2f})")
-                    else:
-                        # 配列長に基づいてデータを正規化
-                        normalized_data = np.zeros((self.__array_length, 2))
-                        for i in range(self.__array_length):
-                            pct = i / (self.__array_length - 1)
-                            normalized_data[i, 0] = pct
-                            
-                            # その%に最も近いデータポイントを見つける
-                            closest_idx = np.argmin(np.abs(sorted_data[:, 0] - pct))
-                            normalized_data[i, 1] = sorted_data[closest_idx, 1]
-                        
-                        # 平均データを更新
-                        if self.__collected_laps_count == 0:
-                            # 初回データ取得時は、そのまま代入
-                            self.__avg_fuel_usage = normalized_data.copy()
-                        else:
-                            # 2回目以降は、既存データと新データの単純平均を計算（要素ごと）
-                            self.__avg_fuel_usage = (self.__avg_fuel_usage + normalized_data) / 2
-                        
-                        self.__collected_laps_count += 1
-                        self.fuel_data_updated.emit()
-                        print(f"周回 {self.__current_lap} の燃料使用データを処理しました。合計 {self.__collected_laps_count} 周のデータを収集済み。")
+                    reason, sorted_data = validate_lap(self.__lap_buffer.data)
+                if reason is not None:
+                    self.__reject_lap(lap_state.lap, reason)
+                else:
+                    self.__close_lap(lap_state.lap, sorted_data, current_fuel)
             
             # 新しいラップの開始
-            self.__current_lap = current_lap
             self.__lap_start_fuel = current_fuel
-            
-            # 新しいラップ開始時にTrackLocをチェック - ピットレーン/コース外なら即無効化
-            if not (track_loc == 3 or track_loc == 0):
+            # ラップ開始時にピットレーン/コース外なら即無効化
+            if not lap_state.start_lap(current_lap, on_track):
                 print(f"周回 {current_lap} は無効です: ラップ開始時にピットレーン検出")
-                self.__invalid_lap = current_lap
-                self.__collecting_lap_data = False
-            else:
-                # 無効なラップフラグをリセット（新しいラップが有効なので）
-                self.__invalid_lap = -1
-                self.__collecting_lap_data = True
+                self.__instrumentation.count('lap_rejected.pit')
             
-            self.__current_lap_data = np.empty((0, 2))
+            self.__lap_buffer.clear()
+            self.__sectors.start_lap()
+            self.__emit_sectors()
         
-        # 走行中にピットレーンに入った場合、この周のデータ収集をキャンセル
-        if not (track_loc == 3 or track_loc == 0):  # トラック外
-            if self.__invalid_lap != current_lap:
-                print(f"ピットレーン検出: 周回 {current_lap} のデータ収集を中止します。")
-                self.__invalid_lap = current_lap  # このラップを無効としてマーク
-            
-            self.__collecting_lap_data = False
-            self.__current_lap_data = np.empty((0, 2))
+        # 走行中にピットレーンに入った場合やレッカー移動の場合、この周のデータ収集をキャンセル
+        if not on_track or snapshot.tow_time:
+            reason = 'pit' if not on_track else 'tow'
+            if lap_state.invalidate(reason):
+                print(f"{REJECT_REASONS[reason]}: 周回 {current_lap} のデータ収集を中止します。")
+                self.__instrumentation.count(f'lap_rejected.{reason}')
+            self.__lap_buffer.clear()
             return
             
         # 現在のラップのデータを収集（無効なラップでなければ）
-        if self.__collecting_lap_data and self.__invalid_lap != current_lap:
+        if lap_state.collecting:
             fuel_used = self.__lap_start_fuel - current_fuel
-            # 新しいデータポイントを配列に追加
-            new_data_point = np.array([[current_lap_pct, fuel_used]])
-            self.__current_lap_data = np.vstack((self.__current_lap_data, new_data_point))
+            # 新しいデータポイントをバッファに追加
+            self.__lap_buffer.append(current_lap_pct, fuel_used, session_time)
+            # セクターの境界を越えた時だけセクターの使用量を確定して通知
+            if self.__sectors.update(current_lap_pct, fuel_used):
+                self.__emit_sectors()
+    
+    def __reject_lap(self, lap:int, reason:str):
+        """周回完了時の検証で無効になったラップを記録"""
+        detail = ''
+        if reason == 'points':
+            detail = f" ({len(self.__lap_buffer)}ポイント)"
+        elif reason == 'coverage':
+            detail = f" ({self.__lap_buffer.data[:, 0].max():.2f})"
+        print(f"周回 {lap} は無効です: {REJECT_REASONS[reason]}{detail}")
+        self.__instrumentation.count(f'lap_rejected.{reason}')
     
-    def update_view_data(self):
+    def __close_lap(self, lap:int, sorted_data, current_fuel:float):
+        """検証済みのラップのデータ（進行度でソート済み）を平均データに反映"""
+        # 最後のセクターを確定（平均との差分は今回の周を含める前の平均と比較する）
+        self.__sectors.complete_lap(self.__lap_start_fuel - current_fuel)
+        
+        # 配列長に基づいてデータを正規化
+        start = time.perf_counter_ns()
+        normalized_usage = resample(sorted_data[:, 0], sorted_data[:, 1], self.__avg_fuel_usage[:, 0], self.__config['resample_mode'])
+        
+        # 基準のラップの候補として保持
+        self.__reference_pool.add(normalized_usage)
+        
+        # 平均データを更新（設定された集約方法でO(bins)の逐次更新）
+        self.__aggregator.update(normalized_usage)
+        self.__avg_fuel_usage[:, 1] = self.__aggregator.curve
+        # 規定の周回数が集まったら、使用率の変化が大きい位置ほど細かいビンの配置に切り替える
+        if (self.__config['bin_layout'] == 'adaptive' and not self.__grid_adapted and
+                self.__aggregator.count >= self.__config['adaptive_warmup_laps']):
+            self.__adapt_grid()
+        self.__on_profile_changed()
+        self.__instrumentation.record('lap_close', time.perf_counter_ns() - start)
+        self.__instrumentation.count('lap_accepted')
+        
+        # 一定のラップ数ごとにバックグラウンドで保存（クラッシュしても集めたデータを失わないように）
+        self.__laps_since_checkpoint += 1
+        checkpoint_laps = self.__config['checkpoint_laps']
+        if checkpoint_laps > 0 and self.__laps_since_checkpoint >= checkpoint_laps:
+            self.save_fuel_data()
+        
+        self.fuel_data_updated.emit()
+        print(f"周回 {lap} の燃料使用データを処理しました。合計 {self.__aggregator.count} 周のデータを収集済み。")
+    
+    def update_view_data(self, snapshot:TelemetrySnapshot):
         """ビューを更新するためのデータを計算し、シグナルを発行"""
         if not self.__is_ir_connected:
             return
 
         try:
-            current_lap_pct = self.__ir['LapDistPct']
-            track_loc = self.__ir['CarIdxTrackSurface'][self.__ir['DriverInfo']['DriverCarIdx']]
-            session_state = self.__ir['SessionState']  # セッション状態を取得
+            current_lap_pct = snapshot.lap_pct
+            track_loc = snapshot.track_loc
+            session_state = snapshot.session_state  # セッション状態を取得
             
             # セッション状態が4（レース中）でない場合、ゼロ値を送信
             if session_state != 4:
+                self.__projection.clear()
+                self.__emit_projection()
+                self.band_update.emit(0.0)
                 self.view_update.emit(0.0, 0.0, 0.0, 0.0, current_lap_pct, track_loc)
                 return
             
-            if self.__collecting_lap_data and self.__invalid_lap != self.__ir['Lap'] and self.__collected_laps_count > 0:
-                current_usage = self.__lap_start_fuel - self.__ir['FuelLevel']
-                avg_data = self.__avg_fuel_usage.copy()
-                
-                # 現在の進行度に対応するインデックス
-                current_idx = current_lap_pct * (self.__array_length - 1)
+            # レース終了までの予測（ピットレーンにいる間も更新する）
+            self.__projection.update(self.__fuel_level, current_lap_pct, snapshot.session_laps_remain,
+                                     snapshot.session_time_remain, snapshot.last_lap_time)
+            self.__emit_projection()
+            
+            if self.__lap_state.collecting and self.__aggregator.count > 0:
+                current_usage = self.__lap_start_fuel - self.__fuel_level
+                lookup = self.__view_lookup  # 比較の基準（平均または選択したラップ）
                 
-                # 履歴に現在のインデックスと使用量を追加（履歴は保持するが補間には使用しない）
-                self.__index_history.append(current_idx)
+                # 履歴に現在の進行度と使用量を追加
+                self.__pct_history.append(current_lap_pct)
                 self.__usage_history.append(current_usage)
-                if len(self.__index_history) > self.__history_length:
-                    self.__index_history.pop(0)
+                if len(self.__pct_history) > self.__history_length:
+                    self.__pct_history.pop(0)
                     self.__usage_history.pop(0)
                 
                 # 現在位置における平均燃料使用量を計算（線形補間）
-                exact_idx = current_lap_pct * (self.__array_length - 1)
-                lower_idx = int(exact_idx)
-                upper_idx = min(lower_idx + 1, self.__array_length - 1)
-                fraction = exact_idx - lower_idx
-                lower_value = avg_data[lower_idx, 1]
-                upper_value = avg_data[upper_idx, 1]
-                cum_avg_usage = lower_value + fraction * (upper_value - lower_value)
+                cum_avg_usage = lookup.at(current_lap_pct)
+                
+                # 現在位置でのラップ間のばらつき（分散は周回完了時に更新済み）
+                band = self.__config['band_sigma'] * np.sqrt(lookup.interpolate(self.__aggregator.variance, current_lap_pct))
                 
                 # 累積差分の計算
                 cumul_delta = current_usage - cum_avg_usage
                 
                 # 瞬間的な燃料使用量の変化率を計算
                 # 最新の2点のデータがあれば、その変化率を計算
-                if len(self.__usage_history) >= 2 and len(self.__index_history) >= 2:
-                    # 最新の2点から変化率を計算
+                if len(self.__usage_history) >= 2:
+                    # 最新の2点から変化率を計算（インデックス単位）
                     latest_usage_diff = self.__usage_history[-1] - self.__usage_history[-2]
-                    latest_idx_diff = self.__index_history[-1] - self.__index_history[-2]
+                    latest_idx_diff = (self.__pct_history[-1] - self.__pct_history[-2]) * self.__rate_scale
                     
                     # インデックスの差が0より大きい場合のみ計算
                     if latest_idx_diff > 0:
                         current_rate = latest_usage_diff / latest_idx_diff
                         
-                        # 平均データからも同様の区間での変化率を計算
-                        latest_lower_idx = int(self.__index_history[-2])
-                        latest_upper_idx = int(self.__index_history[-1])
-                        
-                        # インデックスが同じ場合は1つ前と比較
-                        if latest_lower_idx == latest_upper_idx:
-                            latest_lower_idx = max(0, latest_lower_idx - 1)
-                        
-                        # 配列範囲内に収める
-                        latest_lower_idx = max(0, min(latest_lower_idx, self.__array_length - 1))
-                        latest_upper_idx = max(0, min(latest_upper_idx, self.__array_length - 1))
-                        
-                        avg_usage_diff = avg_data[latest_upper_idx, 1] - avg_data[latest_lower_idx, 1]
-                        avg_rate = avg_usage_diff / (latest_upper_idx - latest_lower_idx) if latest_upper_idx > latest_lower_idx else 0
+                        # 平均データからも同じ区間での変化率を計算（ビン内も補間するため量子化されない）
+                        avg_usage_diff = lookup.between(self.__pct_history[-2], self.__pct_history[-1])
+                        avg_rate = avg_usage_diff / latest_idx_diff
                         
                         # 瞬間的な差分 = 現在の変化率 - 平均の変化率
                         inst_delta = current_rate - avg_rate
@@ -411,46 +805,60 @@ class Model(QObject):
                 else:
                     inst_delta = 0.0
                 
+                self.band_update.emit(float(band))
                 self.view_update.emit(inst_delta, cumul_delta, current_usage, cum_avg_usage, current_lap_pct, track_loc)
             else:
+                self.band_update.emit(0.0)
                 self.view_update.emit(0.0, 0.0, 0.0, 0.0, current_lap_pct, track_loc)
         
         except Exception as e:
             print(f"ビューデータ更新エラー: {e}")
             
+    def __emit_sectors(self):
+        sectors = self.__sectors
+        self.sector_update.emit(tuple(sectors.boundaries.tolist()), tuple(sectors.deltas.tolist()), sectors.sector)
+    
+    def __emit_projection(self):
+        projection = self.__projection
+        self.projection_update.emit(projection.fuel_to_finish, projection.laps_of_fuel, projection.save_per_lap)
+    
     def print_current_status(self):
         """現在の状態を表示（テスト用）"""
-        if not self.__is_ir_connected:
+        snapshot = self.__snapshot
+        if not self.__is_ir_connected or snapshot is None:
             print("iRacingに接続していません。")
             return
             
         try:
-            # 基本情報の表示
-            session_state:SessionState = self.__ir['SessionState']
-            track_surface = self.__ir['CarIdxTrackSurface'][self.__ir['DriverInfo']['DriverCarIdx']]
+            # 基本情報の表示（最後に読み取ったテレメトリを使用）
+            session_state:SessionState = snapshot.session_state
+            track_surface = snapshot.track_loc
             track_location = "トラック上" if (track_surface == 3 or track_surface == 0) else "ピット/コース外"
             
-            collection_status = "収集中" if self.__collecting_lap_data and self.__invalid_lap != self.__ir['Lap'] else "停止中"
+            collection_status = "収集中" if self.__lap_state.collecting else "停止中"
             
             print(f"--------- ステータス情報 ---------")
             print(f'セッション状態: {session_state}')
-            print(f"ラップ: {self.__ir['Lap']} | 進行度: {self.__ir['LapDistPct']:.2f} | 位置: {track_location}")
+            print(f"ラップ: {snapshot.lap} | 進行度: {snapshot.lap_pct:.2f} | 位置: {track_location}")
             print(f"TrackLoc値: {track_surface}")
-            print(f"燃料レベル: {self.__ir['FuelLevel']:.2f}L | データ収集: {collection_status}")
+            print(f"燃料レベル: {snapshot.fuel_level:.2f}L（平滑化後 {self.__fuel_level:.2f}L） | データ収集: {collection_status}")
             print(f"配列サイズ: {self.__array_length}")
+            tick_stats = self.__telemetry.tick_stats
+            print(f"取得方法: {self.__config['acquisition_mode']} | 重複ティック: {tick_stats['duplicate']} | 欠落ティック: {tick_stats['dropped']}")
             
-            if self.__collecting_lap_data and self.__invalid_lap != self.__ir['Lap']:
-                current_points = len(self.__current_lap_data)
+            if self.__lap_state.collecting:
+                current_points = len(self.__lap_buffer)
                 if current_points > 0:
-                    current_usage = self.__current_lap_data[-1, 1] if current_points > 0 else 0
+                    current_usage = self.__lap_buffer.last[1]
                     print(f"現在の周 - データポイント数: {current_points} | 現在の使用量: {current_usage:.4f}L")
             
             # 無効なラップの表示
-            if self.__invalid_lap == self.__ir['Lap']:
-                print(f"注意: 現在の周回 {self.__ir['Lap']} は無効としてマークされています（ピットレーン検出）")
+            lap_state = self.__lap_state
+            if lap_state.state == LapStateMachine.INVALID:
+                print(f"注意: 現在の周回 {lap_state.lap} は無効としてマークされています（{REJECT_REASONS[lap_state.reason]}）")
             
             # 収集データの統計
-            collected_laps = self.__collected_laps_count
+            collected_laps = self.__aggregator.count
             print(f"収集済みラップ数: {collected_laps}")
             
             if collected_laps > 0:
@@ -0,0 +1,115 @@
+import json
+import os
+import re
+import tempfile
+import numpy as np
+
+INDEX_FILE_NAME = 'index.json'
+
+def write_atomic(path:str, write):
+    """
+    同じディレクトリの一時ファイルにwrite(f)で書き込み、os.replaceで置き換える。
+    途中でクラッシュしても元のファイルが壊れることはない。
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def profile_key(track_id, car_id, track_config:str):
+    """(トラックID, 車両ID, トラック構成) からプロファイルのキーを作成"""
+    return f'{track_id}-{car_id}-{track_config}'
+
+class ProfileStore:
+    """
+    トラック・車両・トラック構成ごとの燃料プロファイルを保存するストア。
+    各プロファイルは配列をそのまま格納した.npzファイルとして保存し、index.jsonで管理する。
+    """
+
+    def __init__(self, directory:str):
+        self.__directory = directory
+        self.__index = None  # 最初に必要になった時に読み込む
+
+    @property
+    def directory(self):
+        return self.__directory
+
+    def keys(self):
+        """保存されているプロファイルのキー"""
+        return list(self.__get_index().keys())
+
+    def info(self, key:str):
+        """プロファイルのメタデータ（存在しない場合はNone）"""
+        entry = self.__get_index().get(key)
+        return None if entry is None else dict(entry['meta'])
+
+    def load(self, key:str):
+        """
+        キーに一致するプロファイルだけを読み込み、(配列の辞書, メタデータ) を返す。
+        存在しない場合や読み込めない場合はNone。
+        """
+        entry = self.__get_index().get(key)
+        if entry is None:
+            return None
+        path = os.path.join(self.__directory, entry['file'])
+        try:
+            with np.load(path, allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except (OSError, ValueError) as e:
+            print(f"プロファイルの読み込みに失敗しました: {path}: {e}")
+            return None
+        return arrays, dict(entry['meta'])
+
+    def save(self, key:str, arrays:dict, meta:dict):
+        """プロファイルを保存（配列ファイル、インデックスの順に置き換える）"""
+        os.makedirs(self.__directory, exist_ok=True)
+        file_name = self.__file_name(key)
+        write_atomic(os.path.join(self.__directory, file_name), lambda f: np.savez(f, **arrays))
+        index = dict(self.__get_index())
+        index[key] = {'file': file_name, 'meta': dict(meta)}
+        self.__write_index(index)
+
+    def delete(self, key:str):
+        """プロファイルを削除"""
+        index = dict(self.__get_index())
+        entry = index.pop(key, None)
+        if entry is None:
+            return False
+        self.__write_index(index)
+        try:
+            os.remove(os.path.join(self.__directory, entry['file']))
+        except OSError as e:
+            print(f'ファイルの削除に失敗しました: {e}')
+        return True
+
+    def __file_name(self, key:str):
+        # ファイル名に使えない文字を置き換える
+        return re.sub(r'[^0-9A-Za-z_.-]', '_', key) + '.npz'
+
+    def __get_index(self):
+        if self.__index is None:
+            path = os.path.join(self.__directory, INDEX_FILE_NAME)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.__index = json.load(f)
+            except FileNotFoundError:
+                self.__index = {}
+            except (OSError, ValueError) as e:
+                print(f"プロファイルのインデックスの読み込みに失敗しました: {e}")
+                self.__index = {}
+        return self.__index
+
+    def __write_index(self, index:dict):
+        data = json.dumps(index, ensure_ascii=False, indent=4).encode('utf-8')
+        write_atomic(os.path.join(self.__directory, INDEX_FILE_NAME), lambda f: f.write(data))
+        self.__index = index
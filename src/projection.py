@@ -0,0 +1,70 @@
+import math
+
+UNLIMITED_LAPS = 32767  # SessionLapsRemainExの周回数無制限の値
+
+class RaceProjection:
+    """
+    平均燃料使用曲線と現在の燃料から、完走に必要な燃料・残り燃料で走れる周回数・
+    ピットストップを省くために1周あたりに節約が必要な燃料をティックごとにO(1)で求める。
+    1周の使用量は曲線が更新された時だけset_curve()で計算し直す。
+    """
+
+    def __init__(self):
+        self.__lookup = None
+        self.__lap_fuel = 0.0  # 平均的な1周の燃料使用量
+        self.__lap_time = 0.0  # 最後に取得できた有効な周回時間（秒）
+        self.fuel_to_finish = math.nan  # 完走に必要な燃料（L）
+        self.laps_of_fuel = math.nan  # 現在の燃料で走れる周回数
+        self.save_per_lap = math.nan  # 給油なしで完走するために1周あたりに節約が必要な燃料（L）
+
+    def set_curve(self, lookup, lap_fuel:float):
+        """平均曲線が更新された時に呼び出す"""
+        self.__lookup = lookup
+        self.__lap_fuel = lap_fuel
+
+    def reset(self):
+        """周回時間と予測値を破棄する"""
+        self.__lap_time = 0.0
+        self.clear()
+
+    def clear(self):
+        """予測値を不明にする"""
+        self.fuel_to_finish = math.nan
+        self.laps_of_fuel = math.nan
+        self.save_per_lap = math.nan
+
+    def remaining_laps(self, lap_pct:float, laps_remain, time_remain):
+        """
+        現在位置からチェッカーまでの残り距離（周回数、現在の周の残りを含む）。不明な場合はNaN。
+        laps_remain: SessionLapsRemainEx（現在の周を含む残り周回数）
+        time_remain: SessionTimeRemain（時間制のレースでは残り時間が0になった周で終了する）
+        """
+        remaining = math.nan
+        if laps_remain is not None and 0 < laps_remain < UNLIMITED_LAPS:
+            remaining = laps_remain - lap_pct
+        if time_remain is not None and time_remain > 0 and self.__lap_time > 0:
+            laps = math.floor(lap_pct + time_remain / self.__lap_time) + 1
+            remaining = min(remaining, laps - lap_pct) if not math.isnan(remaining) else laps - lap_pct
+        return remaining
+
+    def update(self, fuel_level:float, lap_pct:float, laps_remain=None, time_remain=None, last_lap_time=None):
+        """ティックごとの予測値の更新"""
+        if last_lap_time is not None and last_lap_time > 0:
+            self.__lap_time = last_lap_time
+        lap_fuel = self.__lap_fuel
+        if self.__lookup is None or lap_fuel <= 0:
+            self.clear()
+            return
+
+        # 現在の周の残りは曲線から、それ以降は1周の使用量で計算する
+        used_in_lap = self.__lookup.at(lap_pct)
+        self.laps_of_fuel = (fuel_level + used_in_lap) / lap_fuel - lap_pct
+
+        remaining = self.remaining_laps(lap_pct, laps_remain, time_remain)
+        if math.isnan(remaining):
+            self.fuel_to_finish = math.nan
+            self.save_per_lap = math.nan
+            return
+        self.fuel_to_finish = (remaining + lap_pct) * lap_fuel - used_in_lap
+        shortfall = self.fuel_to_finish - fuel_level
+        self.save_per_lap = shortfall / remaining if shortfall > 0 and remaining > 0 else 0.0
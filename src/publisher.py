@@ -0,0 +1,122 @@
+import collections
+import json
+import math
+import socket
+import threading
+import time
+
+PUBLISH_HOST = '127.0.0.1'  # 同じPC上のプロセスだけに公開する
+SUBSCRIBER_TIMEOUT_S = 10.0  # この時間データグラムを送ってこない購読者は削除する（購読者は定期的に送り直す）
+POLL_INTERVAL_S = 0.1  # 送信するデータがない場合に購読の要求を確認する間隔
+
+class TelemetryPublisher:
+    """
+    計算したデルタなどを、ローカルのUDPソケットでJSONのデータグラムとして他のオーバーレイに送る。
+    購読者は任意のデータグラム（'unsubscribe'以外）をポートに送ると登録され、以降のメッセージを受け取る。
+    publishはキューに追加するだけで、送信はバックグラウンドのスレッドで行う。
+    メッセージには欠落や順序の入れ替わりを検出できるように通し番号（'seq'）を付ける。
+    キューが一杯の場合は最も古いメッセージを捨てるため、遅い購読者がティックの処理を止めることはない。
+    """
+
+    def __init__(self, port:int, queue_size:int=64, host:str=PUBLISH_HOST):
+        self.__address = (host, port)
+        self.__queue = collections.deque(maxlen=queue_size)
+        self.__wake = threading.Event()
+        self.__closed = False
+        self.__socket = None
+        self.__thread = None
+        self.__subscribers = {}  # アドレス -> 最後にデータグラムを受け取った時刻（送信スレッドだけが使う）
+        self.__published = 0  # キューに追加したメッセージの数
+        self.__dropped = 0  # 送信前に捨てたメッセージの数
+        self.__sent = 0  # 送信したデータグラムの数
+
+    @property
+    def stats(self):
+        """キューに追加・破棄・送信したメッセージの数と購読者の数"""
+        return {'published': self.__published, 'dropped': self.__dropped, 'sent': self.__sent,
+                'subscribers': len(self.__subscribers)}
+
+    def start(self):
+        """ソケットを開いて送信スレッドを開始する。ポートが使用中などで開けない場合はFalse"""
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(self.__address)
+            sock.setblocking(False)
+        except OSError as e:
+            print(f"テレメトリの公開を開始できません ({self.__address[0]}:{self.__address[1]}): {e}")
+            return False
+        self.__socket = sock
+        self.__thread = threading.Thread(target=self.__run, name='TelemetryPublisher', daemon=True)
+        self.__thread.start()
+        print(f"テレメトリを公開しています: udp://{self.__address[0]}:{self.__address[1]}")
+        return True
+
+    def close(self, timeout:float=1.0):
+        """送信スレッドを終了してソケットを閉じる"""
+        self.__closed = True
+        self.__wake.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
+
+    def publish(self, message:dict):
+        """メッセージをキューに追加する（ブロックしない）。NaNはJSONのnullとして送る"""
+        if self.__socket is None:
+            return
+        queue = self.__queue
+        if len(queue) == queue.maxlen:
+            self.__dropped += 1
+        self.__published += 1
+        message['seq'] = self.__published
+        queue.append(message)  # 一杯の場合は最も古いメッセージが押し出される
+        self.__wake.set()
+
+    def __run(self):
+        while not self.__closed:
+            self.__wake.wait(POLL_INTERVAL_S)
+            self.__wake.clear()
+            now = time.monotonic()
+            self.__receive(now)
+            queue = self.__queue
+            while queue:
+                try:
+                    message = queue.popleft()
+                except IndexError:
+                    break
+                if self.__subscribers:
+                    self.__send(message)
+            # 一定時間送ってこない購読者を削除
+            expired = [address for address, seen in self.__subscribers.items() if now - seen > SUBSCRIBER_TIMEOUT_S]
+            for address in expired:
+                del self.__subscribers[address]
+
+    def __receive(self, now:float):
+        """購読の要求（任意のデータグラム）をまとめて受け取る"""
+        while True:
+            try:
+                data, address = self.__socket.recvfrom(256)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # Windowsでは送信先のポートが閉じているとrecvfromがエラーを返す
+                continue
+            if data.strip() == b'unsubscribe':
+                self.__subscribers.pop(address, None)
+            else:
+                self.__subscribers[address] = now
+
+    def __send(self, message:dict):
+        payload = json.dumps({key: None if isinstance(value, float) and math.isnan(value) else value
+                              for key, value in message.items()}).encode('utf-8')
+        for address in list(self.__subscribers):
+            try:
+                self.__socket.sendto(payload, address)
+                self.__sent += 1
+            except BlockingIOError:
+                # 送信バッファが一杯の場合はこのメッセージを捨てる
+                self.__dropped += 1
+            except OSError:
+                del self.__subscribers[address]
@@ -0,0 +1,70 @@
+import numpy as np
+from src.curve_lookup import FuelCurveLookup
+
+REFERENCE_MODES = ('average', 'best', 'last', 'median')
+
+class ReferenceLapPool:
+    """
+    直近capacity周の正規化済みの燃料使用曲線を固定サイズの配列に保持し、比較の基準にするラップを選ぶ。
+    各ラップの参照用の表は周回完了時にその場で作り直すため、基準の切り替えは参照先を変えるだけでよい。
+    """
+
+    def __init__(self, grid, capacity:int=10):
+        self.__grid = np.array(grid, dtype=float)
+        capacity = max(1, capacity)
+        self.__laps = np.zeros((capacity, len(self.__grid)))  # 各行が1周分の累積燃料使用量
+        self.__totals = np.zeros(capacity)  # 各ラップの合計使用量
+        self.__lookups = [FuelCurveLookup(self.__grid, lap) for lap in self.__laps]
+        self.__next = 0  # 次に書き込む行
+        self.__filled = 0  # 保持しているラップ数
+        self.__selected = {}  # 基準の種類 -> 行
+
+    @property
+    def grid(self):
+        return self.__grid
+
+    @property
+    def capacity(self):
+        return len(self.__laps)
+
+    @property
+    def count(self):
+        """保持しているラップ数"""
+        return self.__filled
+
+    def add(self, curve):
+        """有効なラップの曲線を追加（最も古いラップを上書きする）"""
+        row = self.__next
+        self.__laps[row] = curve
+        self.__totals[row] = self.__laps[row, -1] - self.__laps[row, 0]
+        self.__lookups[row].refresh()
+        self.__next = (row + 1) % len(self.__laps)
+        self.__filled = min(self.__filled + 1, len(self.__laps))
+        self.__update_selection(row)
+
+    def clear(self):
+        self.__next = 0
+        self.__filled = 0
+        self.__selected = {}
+
+    def remap(self, new_grid):
+        """ビンの配置が変わった場合に、保持しているラップを新しいグリッドに補間する"""
+        old_grid = self.__grid
+        self.__grid = np.array(new_grid, dtype=float)
+        self.__laps = np.array([np.interp(self.__grid, old_grid, lap) for lap in self.__laps])
+        self.__lookups = [FuelCurveLookup(self.__grid, lap) for lap in self.__laps]
+
+    def lookup(self, mode:str):
+        """基準のラップの参照用の表（'average'またはラップがない場合はNone）"""
+        row = self.__selected.get(mode)
+        return None if row is None else self.__lookups[row]
+
+    def __update_selection(self, last_row:int):
+        """周回完了時に、各基準に該当する行を求めておく"""
+        totals = self.__totals[:self.__filled]
+        order = np.argsort(totals, kind='stable')
+        self.__selected = {
+            'best': int(order[0]),  # 最も燃料使用量が少ないラップ
+            'last': last_row,
+            'median': int(order[(len(order) - 1) // 2]),  # 合計使用量が中央値のラップ
+        }
@@ -0,0 +1,174 @@
+"""
+記録済みのテレメトリ（.ibtファイル、またはsave()で保存した.npzファイル）を再生するデータソース。
+ModelをQTimerなしで実時間より速く駆動し、燃料プロファイルを作り直したり周回の判定を確認したりできる。
+
+実行方法: python -m src.replay <ファイル> [<ファイル> ...] [--fresh]
+"""
+import argparse
+import json
+import os
+import numpy as np
+from irsdk import IBT, IRSDK
+
+# 再生に使うテレメトリ変数
+REPLAY_VARS = (
+    'SessionTick',
+    'Lap',
+    'LapDistPct',
+    'FuelLevel',
+    'SessionState',
+    'SessionTime',
+    'CarIdxTrackSurface',
+    'PlayerTrackSurface',
+    'SessionTimeRemain',
+    'SessionLapsRemainEx',
+    'LapLastLapTime',
+    'PlayerCarTowTime',
+)
+
+# 再生に使うセッション情報のセクション
+SESSION_INFO_KEYS = ('WeekendInfo', 'DriverInfo', 'SessionInfo', 'SplitTimeInfo')
+
+CAR_IDX_COUNT = 64
+
+class ReplayIRSDK:
+    """記録済みのテレメトリを1レコードずつ返す、ModelがIRSDKとして使う範囲の互換クラス"""
+
+    def __init__(self, columns:dict, session_info:dict):
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError('テレメトリ変数のレコード数が一致しません')
+        self.__columns = columns
+        self.__session_info = session_info
+        self.__length = lengths.pop()
+        self.__position = 0
+        self.is_initialized = False
+        self.is_connected = False
+        self.session_info_update = 1
+
+        # CarIdxTrackSurfaceが記録されていない場合（.ibtファイル）はPlayerTrackSurfaceから作る
+        self.__car_idx_track_surface = None
+        if 'CarIdxTrackSurface' not in columns and 'PlayerTrackSurface' in columns:
+            self.__car_idx_track_surface = [-1] * CAR_IDX_COUNT
+            self.__driver_car_idx = session_info['DriverInfo']['DriverCarIdx']
+
+    @classmethod
+    def open(cls, path:str):
+        """拡張子に応じて.ibtファイルまたは記録ファイルを開く"""
+        if os.path.splitext(path)[1].lower() == '.ibt':
+            return cls.from_ibt(path)
+        return cls.from_recording(path)
+
+    @classmethod
+    def from_ibt(cls, path:str):
+        """iRacingの.ibtファイルを読み込む"""
+        ibt = IBT()
+        ibt.open(path)
+        try:
+            columns = {}
+            for key in REPLAY_VARS:
+                if key in ibt.var_headers_names:
+                    columns[key] = np.asarray(ibt.get_all(key))
+        finally:
+            ibt.close()
+
+        # セッション情報はIRSDKのテストファイル読み込みでYAMLを解析する
+        ir = IRSDK()
+        ir.startup(test_file=path)
+        try:
+            session_info = {key: ir[key] for key in SESSION_INFO_KEYS}
+        finally:
+            ir.shutdown()
+        return cls(columns, session_info)
+
+    @classmethod
+    def from_recording(cls, path:str):
+        """save()で保存した記録ファイルを読み込む"""
+        with np.load(path, allow_pickle=False) as npz:
+            columns = {name: npz[name] for name in npz.files if name != 'session_info'}
+            session_info = json.loads(str(npz['session_info']))
+        return cls(columns, session_info)
+
+    def save(self, path:str):
+        """テレメトリとセッション情報を記録ファイルとして保存"""
+        np.savez(path, session_info=np.array(json.dumps(self.__session_info, ensure_ascii=False)), **self.__columns)
+
+    def __len__(self):
+        return self.__length
+
+    @property
+    def position(self):
+        """現在のレコード番号"""
+        return self.__position
+
+    def startup(self, test_file=None, dump_to=None):
+        if self.__position < self.__length:
+            self.is_initialized = True
+            self.is_connected = True
+        return self.is_initialized
+
+    def shutdown(self):
+        self.is_initialized = False
+        self.is_connected = False
+
+    def advance(self):
+        """次のレコードに進む。最後まで再生した場合は切断状態にしてFalseを返す"""
+        if self.__position + 1 >= self.__length:
+            self.__position = self.__length
+            self.is_connected = False
+            return False
+        self.__position += 1
+        return True
+
+    def __getitem__(self, key):
+        column = self.__columns.get(key)
+        if column is not None:
+            value = column[min(self.__position, self.__length - 1)]
+            return value.tolist()
+        if key == 'SessionTick':
+            # ティック番号が記録されていない場合はレコード番号で代用する
+            return self.__position
+        if key == 'CarIdxTrackSurface' and self.__car_idx_track_surface is not None:
+            self.__car_idx_track_surface[self.__driver_car_idx] = self['PlayerTrackSurface']
+            return self.__car_idx_track_surface
+        return self.__session_info.get(key)
+
+def run_replay(model, ir:ReplayIRSDK, fresh:bool=False):
+    """
+    記録の最後までModelを駆動する（Modelはautostart=Falseで作成しておく）。
+    fresh: Trueの場合は保存済みのプロファイルを使わずに最初から集計する
+    """
+    if not model.connect_now():
+        return 0
+    if fresh:
+        model.initialize_model()
+    ticks = 0
+    while True:
+        model.tick()
+        ticks += 1
+        if not ir.advance():
+            break
+    # 最後まで再生すると切断として扱われ、プロファイルが保存される
+    model.check_iracing()
+    return ticks
+
+def main():
+    from src.model import Model
+
+    parser = argparse.ArgumentParser(description='記録済みのテレメトリからModelの燃料プロファイルを作成')
+    parser.add_argument('files', nargs='+', help='.ibtファイルまたは記録ファイル(.npz)')
+    parser.add_argument('--fresh', action='store_true', help='保存済みのプロファイルを使わずに最初から集計する')
+    parser.add_argument('--save-recording', metavar='PATH', help='読み込んだテレメトリを記録ファイルとして保存する（1ファイルのみ）')
+    args = parser.parse_args()
+
+    for i, path in enumerate(args.files):
+        ir = ReplayIRSDK.open(path)
+        if args.save_recording and len(args.files) == 1:
+            ir.save(args.save_recording)
+        model = Model(ir=ir, autostart=False)
+        ticks = run_replay(model, ir, fresh=args.fresh and i == 0)
+        model.flush_writes()  # 切断時に要求したプロファイルの保存を待つ
+        print(f"{path}: {ticks}ティックを再生しました。収集済みラップ数: {model.collected_laps_count}")
+
+if __name__ == "__main__":
+    main()
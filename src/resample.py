@@ -0,0 +1,63 @@
+import numpy as np
+
+RESAMPLE_MODES = ('nearest', 'linear')
+BIN_LAYOUTS = ('uniform', 'adaptive')
+
+def uniform_grid(length:int):
+    """0～1を等間隔に分割したラップの割合の配列を返す（i / (length - 1) と同一の値）"""
+    return np.arange(length) / (length - 1)
+
+def resample_nearest(sorted_pct, values, grid):
+    """
+    各グリッド点に最も近いサンプルの値を返す。
+    np.argmin(np.abs(sorted_pct - pct)) と同じ選び方（距離が同じ場合は先頭側）をsearchsortedで行う。
+    """
+    n = len(sorted_pct)
+    right = np.searchsorted(sorted_pct, grid, side='left')
+    right = np.minimum(right, n - 1)
+    left = np.maximum(right - 1, 0)
+    # 左側の候補は同じ値が続く場合にargminと同じく最初の要素を選ぶ
+    left = np.searchsorted(sorted_pct, sorted_pct[left], side='left')
+    left_dist = np.abs(sorted_pct[left] - grid)
+    right_dist = np.abs(sorted_pct[right] - grid)
+    closest = np.where(left_dist <= right_dist, left, right)
+    return values[closest]
+
+def resample_linear(sorted_pct, values, grid):
+    """サンプル間を線形補間して各グリッド点の値を返す（範囲外は端の値）"""
+    return np.interp(grid, sorted_pct, values)
+
+def resample(sorted_pct, values, grid, mode:str='nearest'):
+    """ラップの割合でソート済みのサンプルをグリッドに正規化する"""
+    if mode == 'linear':
+        return resample_linear(sorted_pct, values, grid)
+    return resample_nearest(sorted_pct, values, grid)
+
+def adaptive_grid(grid, curve, bins:int, uniform_weight:float=0.3, smoothing:float=0.01):
+    """
+    燃料使用曲線から、使用率の変化が大きい位置ほど細かい不等間隔のグリッドを作成する。
+    線形補間の誤差はビン幅の2乗と曲率に比例するため、sqrt(|曲率|)に比例した密度でビンを配置する。
+    uniform_weight: 全体に均等に割り当てる密度の割合（直線などでも最低限の解像度を保つ）
+    smoothing: 曲率を平滑化する幅（ラップの割合）
+    """
+    rate = np.gradient(curve, grid)
+    curvature = np.abs(np.gradient(rate, grid))
+    
+    # 量子化されたFuelLevelによるノイズを抑えるため移動平均で平滑化
+    window = max(1, int(len(grid) * smoothing))
+    if window > 1:
+        curvature = np.convolve(curvature, np.ones(window) / window, mode='same')
+    
+    density = np.sqrt(curvature)
+    mean_density = density.mean()
+    if not np.isfinite(mean_density) or mean_density <= 0:
+        return uniform_grid(bins)
+    density = uniform_weight + (1.0 - uniform_weight) * density / mean_density
+    
+    # 密度の累積分布を等分する位置にビンを置く
+    cdf = np.concatenate(([0.0], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(grid))))
+    cdf /= cdf[-1]
+    new_grid = np.interp(uniform_grid(bins), cdf, grid)
+    new_grid[0] = grid[0]
+    new_grid[-1] = grid[-1]
+    return new_grid
@@ -0,0 +1,121 @@
+import math
+import numpy as np
+from src.lap_validator import is_wrap_jitter
+
+SECTOR_MODES = ('split', 'equal')
+
+def sector_boundaries(split_time_info, mode:str='split', count:int=10):
+    """
+    セクターの境界（ラップの割合、先頭は0、末尾は1）を返す。
+    'split': セッション情報のSplitTimeInfoのセクター（取得できない場合は'equal'と同じ）
+    'equal': count個の等間隔のマイクロセクター
+    """
+    if mode == 'split':
+        try:
+            starts = sorted(float(sector['SectorStartPct']) for sector in split_time_info['Sectors'])
+        except (TypeError, KeyError, ValueError):
+            starts = None
+        if starts:
+            return np.array([0.0] + [pct for pct in starts if 0.0 < pct < 1.0] + [1.0])
+    return np.linspace(0.0, 1.0, max(1, count) + 1)
+
+class SectorTracker:
+    """
+    セクターごとの燃料使用量（平均・最少・前周）と現在の周の差分を集計する。
+    ティックごとの処理は次のセクターの境界と比較するだけで、境界を越えた時だけセクターの合計を確定する。
+    """
+
+    def __init__(self, boundaries):
+        self.__boundaries = np.asarray(boundaries, dtype=float)
+        count = len(self.__boundaries) - 1
+        self.__average = np.full(count, math.nan)  # 平均曲線から求めたセクターごとの使用量
+        self.__average_at_boundary = np.zeros(count + 1)  # 各境界までの平均使用量
+        self.__best = np.full(count, math.nan)  # 有効なラップの中で最も少ない使用量
+        self.__last = np.full(count, math.nan)  # 前の有効なラップの使用量
+        self.__current = np.full(count, math.nan)  # 現在の周で確定したセクターの使用量
+        self.__delta = np.full(count, math.nan)  # セクターごとの平均との差分（現在のセクター以降は前の周の値）
+        self.__sector = 0  # 現在のセクター
+        self.__next_boundary = self.__boundaries[1]
+        self.__sector_start_fuel = 0.0  # 現在のセクターに入った時の周回中の使用量
+        self.__samples = 0  # この周で受け取ったサンプル数（スタートライン付近の揺れの判定用）
+        self.__has_average = False
+
+    @property
+    def boundaries(self):
+        return self.__boundaries
+
+    @property
+    def count(self):
+        return len(self.__boundaries) - 1
+
+    @property
+    def sector(self):
+        """現在のセクター"""
+        return self.__sector
+
+    @property
+    def deltas(self):
+        """セクターごとの平均との差分（現在のセクター以降は前の周の値、記録がない場合はNaN）"""
+        return self.__delta
+
+    def stats(self):
+        """セクターごとの平均・最少・前周の使用量"""
+        return {
+            'boundaries': self.__boundaries.copy(),
+            'average': self.__average.copy(),
+            'best': self.__best.copy(),
+            'last': self.__last.copy(),
+        }
+
+    def set_curve(self, lookup, has_average:bool):
+        """平均曲線が更新された時に、各境界までの平均使用量とセクターごとの平均使用量を計算し直す"""
+        self.__has_average = has_average
+        if not has_average:
+            self.__average[:] = math.nan
+            return
+        for i, pct in enumerate(self.__boundaries):
+            self.__average_at_boundary[i] = lookup.at(pct)
+        self.__average[:] = np.diff(self.__average_at_boundary)
+
+    def start_lap(self):
+        """新しい周の開始（無効なラップの場合も呼び出してその周の集計を破棄する）"""
+        self.__sector = 0
+        self.__next_boundary = self.__boundaries[1]
+        self.__sector_start_fuel = 0.0
+        self.__samples = 0
+        self.__current[:] = math.nan
+
+    def update(self, lap_pct:float, fuel_used:float):
+        """
+        ティックごとの更新。セクターの境界を越えた場合はTrueを返す。
+        fuel_used: 周回の開始からの燃料使用量
+        周回の開始直後の、前の周の終わりの進行度（1.0付近）のサンプルではセクターを進めない（validate_lapと同じ判定）。
+        """
+        index = self.__samples
+        self.__samples = index + 1
+        if is_wrap_jitter(lap_pct, index):
+            return False
+        if lap_pct < self.__next_boundary:
+            return False
+        last_sector = self.count - 1
+        while self.__sector < last_sector and lap_pct >= self.__next_boundary:
+            self.__close_sector(fuel_used)
+            self.__sector += 1
+            self.__next_boundary = self.__boundaries[self.__sector + 1]
+        if self.__sector == last_sector:
+            self.__next_boundary = math.inf  # 最後のセクターは周回の完了時に確定する
+        return True
+
+    def complete_lap(self, lap_fuel:float):
+        """有効な周回の完了。最後のセクターを確定し、前周と最少の使用量を更新する"""
+        self.__close_sector(lap_fuel)
+        self.__last[:] = self.__current
+        np.fmin(self.__best, self.__current, out=self.__best)
+
+    def __close_sector(self, fuel_used:float):
+        sector = self.__sector
+        used = fuel_used - self.__sector_start_fuel
+        self.__current[sector] = used
+        if self.__has_average:
+            self.__delta[sector] = used - self.__average[sector]
+        self.__sector_start_fuel = fuel_used
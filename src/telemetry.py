@@ -0,0 +1,110 @@
+class TelemetrySnapshot:
+    """1ティック分のテレメトリ値をまとめたレコード"""
+
+    __slots__ = ('tick', 'lap', 'lap_pct', 'fuel_level', 'session_state', 'session_time', 'track_loc',
+                 'session_time_remain', 'session_laps_remain', 'last_lap_time', 'tow_time')
+
+    def __init__(self, tick, lap, lap_pct, fuel_level, session_state, session_time, track_loc,
+                 session_time_remain=None, session_laps_remain=None, last_lap_time=None, tow_time=None):
+        self.tick = tick  # SessionTick（シミュレーターのティック番号）
+        self.lap = lap
+        self.lap_pct = lap_pct
+        self.fuel_level = fuel_level
+        self.session_state = session_state
+        self.session_time = session_time
+        self.track_loc = track_loc  # 自車のCarIdxTrackSurface
+        self.session_time_remain = session_time_remain  # SessionTimeRemain（秒）
+        self.session_laps_remain = session_laps_remain  # SessionLapsRemainEx（現在の周を含む）
+        self.last_lap_time = last_lap_time  # LapLastLapTime（秒）
+        self.tow_time = tow_time  # PlayerCarTowTime（レッカー移動中の残り秒数、0は移動中でない）
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'TelemetrySnapshot({fields})'
+
+class TelemetryReader:
+    """IRSDKからティックごとに1回だけ値を読み取り、TelemetrySnapshotを作成する"""
+
+    def __init__(self, ir, instrumentation=None):
+        """instrumentation: 指定した場合は重複・欠落したティック数をカウンタ（'tick.duplicate'、'tick.dropped'）にも加算する"""
+        self.__ir = ir
+        self.__instrumentation = instrumentation
+        self.__driver_car_idx = None
+        self.__session_info_update = None
+        # SessionTickによる重複・欠落の集計
+        self.__last_tick = None
+        self.__last_read_duplicate = False
+        self.__duplicate_ticks = 0
+        self.__dropped_ticks = 0
+
+    @property
+    def last_read_duplicate(self):
+        """直前のreadが前回と同じティックを読み取ったかどうか"""
+        return self.__last_read_duplicate
+
+    @property
+    def tick_stats(self):
+        """重複して読み取ったティック数と読み飛ばしたティック数"""
+        return {'duplicate': self.__duplicate_ticks, 'dropped': self.__dropped_ticks}
+
+    @property
+    def driver_car_idx(self):
+        """セッション情報から取得した自車のインデックス（セッション情報が更新されるまでキャッシュ）"""
+        update = self.__ir.session_info_update
+        if self.__driver_car_idx is None or update != self.__session_info_update:
+            self.__driver_car_idx = self.__ir['DriverInfo']['DriverCarIdx']
+            self.__session_info_update = update
+        return self.__driver_car_idx
+
+    def reset(self):
+        """接続が切れた場合などにキャッシュを破棄する"""
+        self.__driver_car_idx = None
+        self.__session_info_update = None
+        self.__last_tick = None
+        self.__last_read_duplicate = False
+
+    def read(self, wait:bool=False):
+        """
+        現在のテレメトリを読み取る。
+        wait: Trueの場合は最新のバッファを固定し、全ての値を同じティックから読み取る。
+              freeze_var_buffer_latestは新しいデータの通知を最大1ティック待つため、取得スレッドだけで使用する
+              （GUIスレッドのタイマーからは待たずに最新のバッファを読み取る）
+        """
+        ir = self.__ir
+        freeze = getattr(ir, 'freeze_var_buffer_latest', None) if wait else None
+        if freeze is not None:
+            freeze()
+        try:
+            snapshot = TelemetrySnapshot(
+                tick=ir['SessionTick'],
+                lap=ir['Lap'],
+                lap_pct=ir['LapDistPct'],
+                fuel_level=ir['FuelLevel'],
+                session_state=ir['SessionState'],
+                session_time=ir['SessionTime'],
+                track_loc=ir['CarIdxTrackSurface'][self.driver_car_idx],
+                session_time_remain=ir['SessionTimeRemain'],
+                session_laps_remain=ir['SessionLapsRemainEx'],
+                last_lap_time=ir['LapLastLapTime'],
+                tow_time=ir['PlayerCarTowTime'],
+            )
+        finally:
+            if freeze is not None:
+                ir.unfreeze_var_buffer_latest()
+        self.__count_tick(snapshot.tick)
+        return snapshot
+
+    def __count_tick(self, tick):
+        last_tick = self.__last_tick
+        self.__last_tick = tick
+        self.__last_read_duplicate = tick == last_tick
+        if last_tick is None:
+            return
+        if self.__last_read_duplicate:
+            self.__duplicate_ticks += 1
+            if self.__instrumentation is not None:
+                self.__instrumentation.count('tick.duplicate')
+        elif tick > last_tick + 1:
+            self.__dropped_ticks += tick - last_tick - 1
+            if self.__instrumentation is not None:
+                self.__instrumentation.count('tick.dropped', tick - last_tick - 1)
@@ -1,6 +1,8 @@
 from PySide6.QtCore import *
 from PySide6.QtGui import *
 from PySide6.QtWidgets import *
+import math
+import time
 from src.model import Model
 
 class FuelUsageView(QWidget):
@@ -13,6 +15,13 @@ class FuelUsageView(QWidget):
         self.avg_usage = 0.0  # 平均燃料使用量
         self.current_lap_pct = 0.0  # 現在のラップ進行度
         self.track_loc = 0  # 現在のTrackLoc値
+        self.band = 0.0  # 累積差分のラップ間のばらつきの幅
+        self.fuel_to_finish = math.nan  # 完走に必要な燃料
+        self.laps_of_fuel = math.nan  # 現在の燃料で走れる周回数
+        self.save_per_lap = math.nan  # 1周あたりに必要な節約量
+        self.sector_boundaries = (0.0, 1.0)  # セクターの境界
+        self.sector_deltas = (math.nan,)  # セクターごとの平均との差分
+        self.current_sector = 0  # 現在のセクター
         
         # 色の平滑化用の変数
         self._current_color = QColor(200, 200, 200)  # 現在表示中の色（初期値はグレー）
@@ -20,7 +29,7 @@ class FuelUsageView(QWidget):
         self._color_transition_speed = 0.15          # 色の遷移速度（0.0～1.0）
         self._color_update_timer = QTimer(self)
         self._color_update_timer.timeout.connect(self._update_display_color)
-        self._color_update_timer.start(16)  # ~60fps
+        self._color_update_timer.setInterval(16)  # ~60fps（目標色に収束するまでの間だけ動作）
         
         # ウィジェットの設定
         self.setWindowTitle("燃料使用量比較")
@@ -30,9 +39,23 @@ class FuelUsageView(QWidget):
         # 設定にフォントサイズが含まれていない場合、デフォルト値を追加
         if 'font_size' not in self.__config:
             self.__config['font_size'] = 20  # デフォルトフォントサイズ
-            model.set_config(self.__config)
+            model.request_config(self.__config)
+        
+        # 描画のキャッシュ（背景などの変化しない部分、フォント、描画位置）
+        self._static_layer = None
+        self._sector_strip = None  # セクターごとの差分の帯（セクターの境界を越えた時だけ作り直す）
+        self._update_fonts()
+        
+        # 再描画の要求をまとめ、fps_capを上限として表示内容が変わった時だけ描画する
+        self._painted_key = None  # 最後に描画した内容
+        self._last_paint_ns = 0
+        self._repaint_timer = QTimer(self)
+        self._repaint_timer.setSingleShot(True)
+        self._repaint_timer.timeout.connect(self._flush_repaint)
+        self.set_fps_cap(self.__config['fps_cap'])
         
         self.setGeometry(self.__config['x'], self.__config['y'], self.__config['w'], self.__config['h'])
+        self._update_layout()
         self.set_opacity(self.__config['opacity'])
         
         # 色と描画設定 - 単純化
@@ -48,10 +71,14 @@ class FuelUsageView(QWidget):
         self.setWindowFlag(Qt.FramelessWindowHint)     # フレームなし
         
         # モデルのシグナルに接続
-        self.model.fuel_data_updated.connect(self.update)  # 更新シグナルをウィジェットの再描画に接続
+        self._profile_version = model.profile_version  # 最後に受け取った平均データのバージョン
+        self.model.fuel_data_updated.connect(self._on_fuel_data_updated)  # 平均データが変わった時だけ再描画
         self.model.ir_connected.connect(self.show)
         self.model.ir_disconnected.connect(self.hide)
         self.model.view_update.connect(self.update_fuel_data)  # 重要：デルタデータ更新用シグナル接続
+        self.model.band_update.connect(self.update_band)  # view_updateの直前に届くので再描画はそちらに任せる
+        self.model.projection_update.connect(self.update_projection)  # 同上
+        self.model.sector_update.connect(self.update_sectors)
         
         # マウスドラッグ用の変数
         self.dragging = False
@@ -67,6 +94,14 @@ class FuelUsageView(QWidget):
         # 最小サイズを設定
         self.setMinimumSize(1, 1)
         
+        # デバッグ表示（計測結果のテキストは1秒ごとに更新）
+        self._debug_lines = []
+        self._debug_timer = QTimer(self)
+        self._debug_timer.timeout.connect(self._update_debug_lines)
+        if self.__config['debug_overlay']:
+            self._update_debug_lines()
+            self._debug_timer.start(1000)
+        
     def _update_display_color(self):
         """色を目標色に向かって徐々に変化させる（HSVベース）"""
         if self._current_color == self._target_color:
@@ -91,11 +126,16 @@ class FuelUsageView(QWidget):
         v = int(v1 + (v2 - v1) * self._color_transition_speed)
         a = int(a1 + (a2 - a1) * self._color_transition_speed)
         
-        # 更新された色を設定
-        self._current_color = QColor.fromHsv(h, s, v, a)
+        # 更新された色を設定（整数の丸めで変化しなくなった場合は目標色にそろえる）
+        color = QColor.fromHsv(h, s, v, a)
+        self._current_color = self._target_color if color == self._current_color else color
+        
+        # 目標色に収束したらタイマーを止める
+        if self._current_color == self._target_color:
+            self._color_update_timer.stop()
         
         # 再描画をトリガー
-        self.update()
+        self._request_repaint()
 
     def get_color_by_delta(self, delta):
         """
@@ -138,63 +178,244 @@ class FuelUsageView(QWidget):
             self.get_color_by_delta(self.inst_delta)
         else:
             self._target_color = self.neutral_color
+        if self._target_color != self._current_color and not self._color_update_timer.isActive():
+            self._color_update_timer.start()
             
-        self.update()
+        self._request_repaint()
+    
+    def _on_fuel_data_updated(self):
+        """平均データのバージョンが変わった場合のみ再描画"""
+        if self.model.profile_version == self._profile_version:
+            return
+        self._profile_version = self.model.profile_version
+        self._request_repaint(force=True)
+    
+    def update_band(self, band):
+        """Modelから送信されたばらつきの幅を保存"""
+        self.band = band
+    
+    def update_projection(self, fuel_to_finish, laps_of_fuel, save_per_lap):
+        """Modelから送信されたレース終了までの予測を保存"""
+        self.fuel_to_finish = fuel_to_finish
+        self.laps_of_fuel = laps_of_fuel
+        self.save_per_lap = save_per_lap
+    
+    def update_sectors(self, boundaries, deltas, sector):
+        """Modelから送信されたセクターごとの差分を保存し、帯を作り直す"""
+        self.sector_boundaries = boundaries
+        self.sector_deltas = deltas
+        self.current_sector = sector
+        self._sector_strip = None
+        if self.__config['show_sectors']:
+            self._request_repaint(force=True)
+    
+    def projection_text(self):
+        """2行目に表示する予測のテキスト（不明な値は--）"""
+        def fmt(value, spec):
+            return '--' if math.isnan(value) else format(value, spec)
+        return (f"完走 {fmt(self.fuel_to_finish, '.1f')}L  残り {fmt(self.laps_of_fuel, '.1f')}周  "
+                f"節約 {fmt(self.save_per_lap, '.2f')}L/周")
+    
+    def _update_debug_lines(self):
+        """デバッグ表示のテキストを更新"""
+        self._debug_lines = self.model.instrumentation.overlay_lines()
+        self._request_repaint(force=True)
+    
+    def set_fps_cap(self, fps):
+        """1秒あたりの最大描画回数を設定"""
+        self._frame_interval_ms = 1000.0 / max(1, fps)
+    
+    def _frame_key(self):
+        """描画結果を決める値（前回の描画と同じであれば再描画しない）"""
+        max_bar_width = self._max_bar_width
+        return (
+            f"{self.cumul_delta:+.3f}",
+            self.cumul_delta > 0,
+            abs(self.cumul_delta) < 0.001,
+            int(min(1.0, abs(self.cumul_delta) / 0.125) * max_bar_width),
+            int(min(1.0, self.band / 0.125) * max_bar_width),
+            self._current_color.rgba(),
+            self.track_loc == 1 or self.track_loc == 2,
+            self.projection_text() if self.__config['show_projection'] else None,
+        )
+    
+    def _request_repaint(self, force=False):
+        """
+        再描画を要求する。複数の要求は次のフレームの1回の描画にまとめる。
+        force: 表示内容の比較に含まれない変更（背景、デバッグ表示など）の場合はTrue
+        """
+        if force:
+            self._painted_key = None
+        if self._repaint_timer.isActive():
+            return
+        elapsed_ms = (time.perf_counter_ns() - self._last_paint_ns) / 1e6
+        self._repaint_timer.start(max(0, int(self._frame_interval_ms - elapsed_ms)))
+    
+    def _flush_repaint(self):
+        """表示内容が変わっている場合だけ描画"""
+        if self._frame_key() != self._painted_key:
+            self.update()
     
     def paintEvent(self, event):
-        """ウィジェットの描画"""
-        painter = QPainter(self)
+        """ウィジェットの描画（描画時間を計測する）"""
+        start = time.perf_counter_ns()
+        self._last_paint_ns = start
+        self._painted_key = self._frame_key()
+        self._paint(event)
+        self.model.instrumentation.record('paintEvent', time.perf_counter_ns() - start)
+    
+    # 追加パディングの設定（ウィンドウの端に余裕を持たせる）
+    WINDOW_PADDING = 20
+    TEXT_PADDING = 5
+    
+    def _update_layout(self):
+        """ウィンドウサイズから決まる描画位置を計算（サイズが変わった時だけ）"""
+        self._center_x = self.width() // 2
+        self._bar_height = max(20, int(self.height() * 0.15))  # 画面高さの15%をバーの高さとして採用（最小20ピクセル）
+        self._bar_y = int((self.height() - self._bar_height) / 2)     # 垂直中央に配置
+        self._max_bar_width = (self.width() - self.WINDOW_PADDING * 2 - 40) // 2  # パディングを考慮
+    
+    def _update_fonts(self):
+        """フォントとフォントメトリクスを作成（フォントサイズが変わった時だけ）"""
+        self._font = QFont("Arial", self.__config['font_size'], QFont.Bold)
+        self._font_metrics = QFontMetrics(self._font)
+        self._projection_font = QFont("Arial", max(8, int(self.__config['font_size'] * 0.6)), QFont.Bold)
+        self._debug_font = QFont("Consolas", 8)
+        self._text_rect_cache = {}  # テキストごとの大きさ
+    
+    def _invalidate_static_layer(self):
+        """背景などの変化しない部分を次の描画で作り直す"""
+        self._static_layer = None
+        self._request_repaint(force=True)
+    
+    def _build_static_layer(self):
+        """背景、バーの背景、リサイズハンドルをピクスマップに描画しておく"""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(self.width() * ratio), int(self.height() * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
         painter.setRenderHint(QPainter.Antialiasing)
         
-        # 追加パディングの設定（ウィンドウの端に余裕を持たせる）
-        window_padding = 20
-        text_padding = 5
-        
         # 背景の描画
         painter.setPen(Qt.NoPen)
         painter.setBrush(self.bg_color)
         painter.drawRoundedRect(self.rect(), 10, 10)
         
-        # 画面の中央に配置するための計算例
-        center_x = self.width() // 2
-        bar_height = max(20, int(self.height() * 0.15))  # 画面高さの15%をバーの高さとして採用（最小20ピクセル）
-        bar_y = int((self.height() - bar_height) / 2)     # 垂直中央に配置
-        max_bar_width = (self.width() - window_padding * 2 - 40) // 2  # パディングを考慮
-        
         # デルタバー背景の描画（パディングを考慮）
-        bg_rect = QRect(window_padding + 20, bar_y, self.width() - window_padding * 2 - 40, bar_height)
+        bg_rect = QRect(self.WINDOW_PADDING + 20, self._bar_y, self.width() - self.WINDOW_PADDING * 2 - 40, self._bar_height)
         painter.setBrush(QColor(20, 20, 20, 150))
         painter.drawRoundedRect(bg_rect, 5, 5)
         
+        # リサイズハンドルなどの描画
+        if not self.__config['locked']:
+            pen = QPen(QColor(255, 255, 255, 80))
+            pen.setWidth(1)
+            painter.setPen(pen)
+            resize_triangle = QPolygon([
+                QPoint(self.width() - 10, self.height()),
+                QPoint(self.width(), self.height() - 10),
+                QPoint(self.width(), self.height())
+            ])
+            painter.setBrush(QColor(255, 255, 255, 80))
+            painter.drawPolygon(resize_triangle)
+        painter.end()
+        return pixmap
+    
+    def _build_sector_strip(self, width, height):
+        """セクターごとの差分を色で表した帯をピクスマップに描画"""
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(width * ratio), int(height * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setPen(Qt.NoPen)
+        boundaries = self.sector_boundaries
+        for i, delta in enumerate(self.sector_deltas):
+            left = int(boundaries[i] * width)
+            right = int(boundaries[i + 1] * width)
+            if math.isnan(delta):
+                color = QColor(20, 20, 20, 150)
+            else:
+                # 0.02L以上の差分で最も濃くする
+                color = QColor(self.positive_color if delta > 0 else self.negative_color)
+                color.setAlpha(int(80 + 175 * min(1.0, abs(delta) / 0.02)))
+            # 現在のセクター以降は前の周の値なので薄く表示
+            if i >= self.current_sector:
+                color.setAlpha(color.alpha() // 2)
+            painter.setBrush(color)
+            painter.drawRect(left, 0, max(1, right - left - 1), height)
+        painter.end()
+        return pixmap
+    
+    def _text_rect(self, text):
+        """テキストの大きさ（同じ文字列は再計測しない）"""
+        rect = self._text_rect_cache.get(text)
+        if rect is None:
+            if len(self._text_rect_cache) > 256:
+                self._text_rect_cache.clear()
+            rect = self._text_rect_cache[text] = self._font_metrics.boundingRect(text)
+        return rect
+    
+    def resizeEvent(self, event):
+        """サイズが変わったら描画位置と背景を作り直す"""
+        super().resizeEvent(event)
+        self._update_layout()
+        self._sector_strip = None
+        self._invalidate_static_layer()
+    
+    def _paint(self, event):
+        """ウィジェットの描画（変化しない部分はキャッシュしたピクスマップを使う）"""
+        painter = QPainter(self)
+        
+        if self._static_layer is None:
+            self._static_layer = self._build_static_layer()
+        painter.drawPixmap(0, 0, self._static_layer)
+        painter.setRenderHint(QPainter.Antialiasing)
+        
+        window_padding = self.WINDOW_PADDING
+        text_padding = self.TEXT_PADDING
+        center_x = self._center_x
+        bar_height = self._bar_height
+        bar_y = self._bar_y
+        max_bar_width = self._max_bar_width
+        
         painter.setPen(Qt.NoPen)
         
+        # ラップ間のばらつきの範囲を描画（この範囲内の累積差分は通常の誤差）
+        band_width = int(min(1.0, self.band / 0.125) * max_bar_width)
+        if band_width > 0:
+            painter.setBrush(QColor(255, 255, 255, 40))
+            painter.drawRect(center_x - band_width, bar_y, band_width * 2, bar_height)
+            painter.setBrush(QColor(255, 255, 255, 120))
+            painter.drawRect(center_x - band_width, bar_y, 1, bar_height)
+            painter.drawRect(center_x + band_width - 1, bar_y, 1, bar_height)
+        
         # バーの幅は従来通り累計差分で決定
         normalized_delta = min(1.0, abs(self.cumul_delta) / 0.125)
         bar_width = int(normalized_delta * max_bar_width)
 
         if bar_width > 1:
+            # 色は現在の表示色を使用（平滑化された色）
+            painter.setBrush(self._current_color)
             # バーの向きと幅は累計差分で決定
-            if self.cumul_delta < 0:  # 累計差分が負の場合（燃費が良い）
-                # 色は現在の表示色を使用（平滑化された色）
-                painter.setBrush(self._current_color)
-
-                # バーは右側に描画
-                painter.drawRect(
-                center_x, bar_y + 2, bar_width, bar_height - 4)
-            elif self.cumul_delta > 0:  # 累計差分が正の場合（燃費が悪い）
-                # 色は現在の表示色を使用（平滑化された色）
-                painter.setBrush(self._current_color)
-
-                # バーは左側に描画
-                painter.drawRect(
-                center_x - bar_width, bar_y + 2, bar_width, bar_height - 4)
+            if self.cumul_delta < 0:  # 累計差分が負の場合（燃費が良い）は右側に描画
+                painter.drawRect(center_x, bar_y + 2, bar_width, bar_height - 4)
+            elif self.cumul_delta > 0:  # 累計差分が正の場合（燃費が悪い）は左側に描画
+                painter.drawRect(center_x - bar_width, bar_y + 2, bar_width, bar_height - 4)
+        
+        # セクターごとの差分の帯（バーの下）
+        if self.__config['show_sectors']:
+            if self._sector_strip is None:
+                self._sector_strip = self._build_sector_strip(self.width() - window_padding * 2 - 40, 6)
+            painter.drawPixmap(window_padding + 20, bar_y + bar_height + 2, self._sector_strip)
         
         # 設定されたフォントサイズを使用
-        painter.setFont(QFont("Arial", self.__config['font_size'], QFont.Bold))
+        painter.setFont(self._font)
         delta_text = f"{self.cumul_delta:+.3f}L"  # テキストは従来通り累計差分を表示
         
         # テキストのサイズ計算
-        text_rect = painter.fontMetrics().boundingRect(delta_text)
+        text_rect = self._text_rect(delta_text)
         text_width = text_rect.width() + text_padding * 2  # パディングを含むテキスト幅
         
         # テキスト位置の計算（累積差分に基づく）
@@ -218,7 +439,6 @@ class FuelUsageView(QWidget):
         text_bg_rect = QRect(text_x, text_y - text_rect.height(), text_width, text_rect.height() + text_padding)
         
         # テキスト背景を描画
-        painter.setPen(Qt.NoPen)
         painter.setBrush(QColor(20, 20, 20, 150))
         painter.drawRoundedRect(text_bg_rect, 5, 5)
         
@@ -233,18 +453,26 @@ class FuelUsageView(QWidget):
         # 調整された位置にテキストを描画
         painter.drawText(text_bg_rect, Qt.AlignCenter, delta_text)
         
-        # リサイズハンドルなどの描画
-        if not self.__config['locked']:
-            pen = QPen(QColor(255, 255, 255, 80))
-            pen.setWidth(1)
-            painter.setPen(pen)
-            resize_triangle = QPolygon([
-                QPoint(self.width() - 10, self.height()),
-                QPoint(self.width(), self.height() - 10),
-                QPoint(self.width(), self.height())
-            ])
-            painter.setBrush(QColor(255, 255, 255, 80))
-            painter.drawPolygon(resize_triangle)
+        # レース終了までの予測（バーの上に小さめの文字で表示）
+        if self.__config['show_projection']:
+            painter.setFont(self._projection_font)
+            projection_rect = QRect(window_padding, 0, self.width() - window_padding * 2, bar_y - text_padding)
+            # 節約が必要な場合は赤、不要な場合は緑
+            if math.isnan(self.save_per_lap):
+                painter.setPen(self.neutral_color)
+            elif self.save_per_lap > 0:
+                painter.setPen(self.positive_color)
+            else:
+                painter.setPen(self.negative_color)
+            painter.drawText(projection_rect, Qt.AlignHCenter | Qt.AlignBottom, self.projection_text())
+        
+        # デバッグ表示
+        if self.__config['debug_overlay'] and self._debug_lines:
+            painter.setFont(self._debug_font)
+            painter.setPen(QColor(255, 255, 255, 200))
+            line_height = painter.fontMetrics().height()
+            for i, line in enumerate(self._debug_lines):
+                painter.drawText(4, line_height * (i + 1), line)
     
     def contextMenuEvent(self, event):
         """右クリックメニューの表示"""
@@ -289,6 +517,45 @@ class FuelUsageView(QWidget):
         custom_font_action = font_menu.addAction("カスタムサイズ...")
         custom_font_action.triggered.connect(self.show_custom_font_dialog)
         
+        # 最大フレームレート設定のサブメニュー
+        fps_menu = menu.addMenu("最大フレームレート")
+        fps_group = QActionGroup(self)
+        for fps in [15, 30, 60, 120]:
+            action = fps_menu.addAction(f"{fps}fps")
+            action.setCheckable(True)
+            action.setChecked(self.__config['fps_cap'] == fps)
+            action.triggered.connect(lambda checked, f=fps: self.set_fps_cap_config(f))
+            fps_group.addAction(action)
+        
+        # 比較の基準のサブメニュー
+        reference_menu = menu.addMenu("比較の基準")
+        reference_options = [("平均", 'average'), ("最も燃料が少ないラップ", 'best'), ("前の周", 'last'), ("中央値のラップ", 'median')]
+        reference_group = QActionGroup(self)
+        for label, mode in reference_options:
+            action = reference_menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(self.__config['reference_lap'] == mode)
+            action.triggered.connect(lambda checked, m=mode: self.set_reference_lap(m))
+            reference_group.addAction(action)
+        
+        # セクター表示アクション
+        sectors_action = menu.addAction("セクターの差分を表示")
+        sectors_action.setCheckable(True)
+        sectors_action.setChecked(self.__config['show_sectors'])
+        sectors_action.triggered.connect(self.toggle_sectors)
+        
+        # 予測表示アクション
+        projection_action = menu.addAction("燃料予測を表示")
+        projection_action.setCheckable(True)
+        projection_action.setChecked(self.__config['show_projection'])
+        projection_action.triggered.connect(self.toggle_projection)
+        
+        # デバッグ表示アクション
+        debug_action = menu.addAction("デバッグ表示")
+        debug_action.setCheckable(True)
+        debug_action.setChecked(self.__config['debug_overlay'])
+        debug_action.triggered.connect(self.toggle_debug_overlay)
+        
         # セパレータ
         menu.addSeparator()
         
@@ -322,9 +589,8 @@ class FuelUsageView(QWidget):
         )
         
         if reply == QMessageBox.Yes:
-            # モデルのinitialize_modelメソッドを実行してデータをリセット
-            self.model.initialize_model()
-            self.model.delete_fuel_data()
+            # モデルのスレッドでデータを初期化し、保存済みのプロファイルを削除
+            self.model.request_reset()
             # 通知
             QToolTip.showText(
                 self.mapToGlobal(QPoint(self.width() // 2, self.height() // 2)),
@@ -354,8 +620,9 @@ class FuelUsageView(QWidget):
     def set_font_size(self, size):
         """フォントサイズを設定"""
         self.__config['font_size'] = size
-        self.model.set_config(self.__config)
-        self.update()  # 画面を再描画
+        self.model.request_config(self.__config)
+        self._update_fonts()
+        self._invalidate_static_layer()  # 画面を再描画
         
         # 設定変更を通知（一時的なトースト通知）
         QToolTip.showText(self.mapToGlobal(QPoint(self.width() // 2, self.height() // 2)), 
@@ -364,18 +631,53 @@ class FuelUsageView(QWidget):
     def toggle_lock(self, checked):
         """ウィンドウのロック状態を切り替え"""
         self.__config['locked'] = checked
-        self.model.set_config(self.__config)
-        self.update()  # リサイズハンドルの表示/非表示を更新
+        self.model.request_config(self.__config)
+        self._invalidate_static_layer()  # リサイズハンドルの表示/非表示を更新
         
         # ロック状態を表示（一時的なトースト通知）
         status = "ロックされました" if checked else "ロック解除されました"
         QToolTip.showText(self.mapToGlobal(QPoint(self.width() // 2, self.height() // 2)), status, self)
     
+    def set_fps_cap_config(self, fps):
+        """最大フレームレートを設定して保存"""
+        self.__config['fps_cap'] = fps
+        self.model.request_config(self.__config)
+        self.set_fps_cap(fps)
+    
+    def set_reference_lap(self, mode):
+        """比較の基準にするラップを設定"""
+        self.__config['reference_lap'] = mode
+        self.model.request_config(self.__config)
+    
+    def toggle_sectors(self, checked):
+        """セクターごとの差分の表示を切り替え"""
+        self.__config['show_sectors'] = checked
+        self.model.request_config(self.__config)
+        self._request_repaint(force=True)
+    
+    def toggle_projection(self, checked):
+        """レース終了までの予測の表示を切り替え"""
+        self.__config['show_projection'] = checked
+        self.model.request_config(self.__config)
+        self._request_repaint(force=True)
+    
+    def toggle_debug_overlay(self, checked):
+        """処理時間などのデバッグ表示を切り替え"""
+        self.__config['debug_overlay'] = checked
+        self.model.request_config(self.__config)
+        if checked:
+            self._update_debug_lines()
+            self._debug_timer.start(1000)
+        else:
+            self._debug_timer.stop()
+            self._request_repaint(force=True)
+    
     def set_opacity(self, opacity):
         """ウィンドウの透明度を設定"""
         self.setWindowOpacity(opacity)
         self.__config['opacity'] = opacity
-        self.model.set_config(self.__config)
+        self.model.request_config(self.__config)
+        self._invalidate_static_layer()
     
     def reset_position(self):
         """ウィンドウの位置をリセット"""
@@ -384,7 +686,7 @@ class FuelUsageView(QWidget):
         # 位置をモデルの設定に保存
         self.__config['x'] = self.x()
         self.__config['y'] = self.y()
-        self.model.set_config(self.__config)
+        self.model.request_config(self.__config)
     
     def mousePressEvent(self, event):
         """マウスボタン押下イベント - ドラッグまたはリサイズ開始"""
@@ -449,7 +751,7 @@ class FuelUsageView(QWidget):
                 self.__config['w'] = self.width()
                 self.__config['h'] = self.height()
                 
-            self.model.set_config(self.__config)
+            self.model.request_config(self.__config)
             
             # カーソルを元に戻す
             self.setCursor(Qt.ArrowCursor)